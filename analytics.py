@@ -0,0 +1,259 @@
+"""Análise do catálogo: quanto cada palpite informa e quão difícil é cada dia.
+
+Cada palpite divide os candidatos restantes pelo padrão de estados que
+devolve (um código por atributo, como no /api/guess). Este módulo calcula
+a matriz completa de padrões palpite×solução com NumPy e deriva dela:
+
+    - o ganho de informação (entropia das partições) de cada palpite;
+    - o melhor primeiro palpite;
+    - o número de palpites de uma estratégia gulosa (máxima entropia) para
+      cada solução possível;
+    - uma dificuldade por dia do calendário usado pelo /api/start_game.
+
+Os resultados ficam em cache por versão do catálogo. Uso:
+
+    python analytics.py [--top 10] [--days 30] [--json]
+
+ou, com a app a correr, GET /admin/analytics?top=10&days=30 (Bearer ANALYTICS_TOKEN).
+
+O NumPy só é necessário para este módulo (pip install numpy).
+"""
+import argparse
+import json
+import sys
+import threading
+from datetime import datetime, timedelta
+
+try:
+    import numpy as np
+except ImportError:  # numpy é opcional; só a análise depende dele
+    np = None
+
+from feedback import CORRECT, HIGHER, LOWER, MULTI_VALUE_KEYS, NUMERIC_KEYS, PARTIAL
+
+# Número de estados possíveis por atributo (base da codificação dos padrões)
+STATUS_BASE = 5
+# Quantas versões do catálogo ficam em cache
+CACHE_SIZE = 4
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError('A análise do catálogo precisa do NumPy (pip install numpy).')
+
+
+def _attribute_codes(key, values):
+    """Matriz n×n de códigos de estado de um atributo, igual à de feedback.FeedbackMatrix."""
+    n = len(values)
+    texts = [str(v).lower() for v in values]
+    _, text_ids = np.unique(np.array(texts, dtype=object), return_inverse=True)
+    codes = np.zeros((n, n), dtype=np.int64)
+
+    if key in NUMERIC_KEYS:
+        numbers = np.zeros(n, dtype=np.int64)
+        valid = np.zeros(n, dtype=bool)
+        for i, value in enumerate(values):
+            try:
+                numbers[i] = int(value)
+                valid[i] = True
+            except (TypeError, ValueError):
+                pass
+        both = valid[:, None] & valid[None, :]
+        codes[both & (numbers[:, None] < numbers[None, :])] = HIGHER
+        codes[both & (numbers[:, None] > numbers[None, :])] = LOWER
+    elif key in MULTI_VALUE_KEYS:
+        parts = [frozenset(p.strip() for p in text.split(',')) for text in texts]
+        vocabulary = {p: i for i, p in enumerate(sorted(set().union(*parts)))}
+        membership = np.zeros((n, len(vocabulary)), dtype=np.int32)
+        for i, row in enumerate(parts):
+            membership[i, [vocabulary[p] for p in row]] = 1
+        codes[(membership @ membership.T) > 0] = PARTIAL
+
+    # Texto igual prevalece sobre qualquer outro estado
+    codes[text_ids[:, None] == text_ids[None, :]] = CORRECT
+    return codes
+
+
+def pattern_matrix(records, keys):
+    """Matriz n×n (int64) com o padrão palpite×solução codificado em base 5."""
+    _require_numpy()
+    n = len(records)
+    patterns = np.zeros((n, n), dtype=np.int64)
+    for key in keys:
+        patterns *= STATUS_BASE
+        patterns += _attribute_codes(key, [r.get(key) for r in records])
+    return patterns
+
+
+def _bucket_sizes(patterns):
+    """Para cada linha de `patterns`, o tamanho do grupo de cada coluna (mesmo padrão na linha)."""
+    rows, cols = patterns.shape
+    if cols == 0:
+        return np.zeros((rows, 0), dtype=np.int64)
+    # Chave única por (linha, padrão): uma só ordenação para a matriz inteira
+    span = int(patterns.max()) + 1
+    keys = patterns + np.arange(rows, dtype=np.int64)[:, None] * span
+    _, inverse, counts = np.unique(keys.ravel(), return_inverse=True, return_counts=True)
+    return counts[inverse].reshape(rows, cols)
+
+
+def information_gain(patterns):
+    """Entropia (bits) da partição dos candidatos (colunas) por cada palpite (linhas)."""
+    rows, cols = patterns.shape
+    if cols == 0:
+        return np.zeros(rows)
+    # Ordenar cada linha deixa os grupos contíguos; os comprimentos das sequências são os tamanhos
+    ordered = np.sort(patterns, axis=1)
+    starts_mask = np.ones((rows, cols), dtype=bool)
+    starts_mask[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    starts = np.flatnonzero(starts_mask)
+    lengths = np.diff(np.append(starts, rows * cols))
+    weights = lengths * np.log2(lengths / cols)
+    return -np.bincount(starts // cols, weights=weights, minlength=rows) / cols
+
+
+def solve_depths(patterns):
+    """Número de palpites até acertar cada solução com a estratégia gulosa de máxima entropia.
+
+    Em cada passo escolhe-se, entre todos os personagens, o palpite com maior
+    entropia sobre os candidatos restantes (em empate, um que ainda seja
+    candidato) e os candidatos são divididos pelo padrão devolvido.
+    """
+    n = patterns.shape[0]
+    depths = np.zeros(n, dtype=np.int64)
+    stack = [(np.arange(n), 1)]
+    while stack:
+        candidates, depth = stack.pop()
+        if len(candidates) == 1:
+            depths[candidates[0]] = depth
+            continue
+        # Arredondado para que empates numéricos não dependam da ordem das somas
+        gain = np.round(information_gain(patterns[:, candidates]), 9)
+        in_candidates = np.zeros(n, dtype=bool)
+        in_candidates[candidates] = True
+        guess = int(np.lexsort((~in_candidates, -gain))[0])
+        row = patterns[guess, candidates]
+        if in_candidates[guess]:
+            depths[guess] = depth
+        for pattern in np.unique(row):
+            group = candidates[(row == pattern) & (candidates != guess)]
+            if len(group):
+                stack.append((group, depth + 1))
+    return depths
+
+
+class Report:
+    """Resultados da análise de um catálogo (tudo em arrays indexados como catalog.names)."""
+
+    def __init__(self, catalog):
+        _require_numpy()
+        self.version = catalog.version
+        self.names = catalog.names
+        self.index = catalog.index
+        self.schedule = catalog.schedule
+        self.patterns = pattern_matrix(catalog.records, catalog.feedback.keys)
+        self.gain = information_gain(self.patterns)
+        self.depths = solve_depths(self.patterns)
+        # Candidatos que restam, em média, depois de um primeiro palpite ao acaso
+        sizes = _bucket_sizes(self.patterns)
+        self.mean_remaining = sizes.mean(axis=0)
+        n = len(self.names)
+        self.difficulty = (self.mean_remaining - 1) / (n - 1) if n > 1 else np.zeros(n)
+
+    @property
+    def best_first_guess(self):
+        return self.names[int(np.argmax(self.gain))]
+
+    @property
+    def expected_guesses(self):
+        """Média de palpites da estratégia gulosa sobre todas as soluções."""
+        return float(self.depths.mean()) if len(self.depths) else 0.0
+
+    def top_guesses(self, count=10):
+        order = np.argsort(-self.gain, kind='stable')[:count]
+        return [{'name': self.names[i], 'bits': round(float(self.gain[i]), 4)} for i in order]
+
+    def solution_stats(self, index):
+        return {
+            'name': self.names[index],
+            'greedyGuesses': int(self.depths[index]),
+            'meanRemainingAfterFirstGuess': round(float(self.mean_remaining[index]), 3),
+            'difficulty': round(float(self.difficulty[index]), 4),
+        }
+
+    def schedule_difficulty(self, start=None, days=30):
+        """Dificuldade dos próximos `days` dias do calendário a partir de `start` (por omissão, hoje)."""
+        start = start or datetime.utcnow().date()
+        rows = []
+        for offset in range(days):
+            day = (start + timedelta(days=offset)).isoformat()
+            record = self.schedule.get(day)
+            if record is None:
+                break
+            rows.append(dict(self.solution_stats(self.index[record['NOME']]), date=day))
+        return rows
+
+    def to_dict(self, top=10, days=30):
+        return {
+            'catalogVersion': self.version,
+            'characters': len(self.names),
+            'bestFirstGuess': self.best_first_guess,
+            'expectedGuesses': round(self.expected_guesses, 4),
+            'topFirstGuesses': self.top_guesses(top),
+            'schedule': self.schedule_difficulty(days=days),
+        }
+
+
+_lock = threading.Lock()
+_reports = {}
+
+
+def get_report(catalog):
+    """Report do catálogo, calculado uma vez por versão."""
+    with _lock:
+        report = _reports.get(catalog.version)
+        if report is None:
+            report = Report(catalog)
+            if len(_reports) >= CACHE_SIZE:
+                _reports.pop(next(iter(_reports)))
+            _reports[catalog.version] = report
+        return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Análise de informação e dificuldade do catálogo.')
+    parser.add_argument('--top', type=int, default=10, help='quantos primeiros palpites mostrar')
+    parser.add_argument('--days', type=int, default=30, help='quantos dias do calendário analisar')
+    parser.add_argument('--json', action='store_true', help='escreve o relatório em JSON')
+    args = parser.parse_args(argv)
+
+    if np is None:
+        print('NumPy não instalado (pip install numpy).')
+        return 2
+
+    from catalog import load_catalog
+    catalog = load_catalog()
+    if not catalog:
+        print('A base de dados está vazia.')
+        return 1
+
+    report = get_report(catalog).to_dict(top=args.top, days=args.days)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return 0
+
+    print(f"Catálogo {report['catalogVersion']}: {report['characters']} personagens")
+    print(f"Melhor primeiro palpite: {report['bestFirstGuess']}")
+    print(f"Palpites esperados (estratégia gulosa): {report['expectedGuesses']:.2f}")
+    print('\nPrimeiros palpites (bits de informação):')
+    for entry in report['topFirstGuesses']:
+        print(f"  {entry['name']:<12} {entry['bits']:.3f}")
+    print('\nCalendário:')
+    for entry in report['schedule']:
+        print(f"  {entry['date']}  {entry['name']:<12} palpites={entry['greedyGuesses']}"
+              f"  restantes={entry['meanRemainingAfterFirstGuess']:.1f}  dificuldade={entry['difficulty']:.3f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,341 +1,629 @@
-import sqlite3
-import os
-import traceback
-import redis
-from datetime import datetime  # Importa a biblioteca de data e hora
-from flask import Flask, jsonify, session, request, send_from_directory
-from flask_cors import CORS
-
-app = Flask(__name__)
-
-# Configuração de caminhos
-project_root = os.path.dirname(os.path.abspath(__file__))
-DATABASE_FILE = os.path.join(project_root, 'eternaldle.db')
-
-# Configuração de Sessão e Segurança
-app.config['SECRET_KEY'] = 'a_chave_secreta_super_dificil_de_adivinhar'
-app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
-app.config['SESSION_COOKIE_SECURE'] = False  # Definir como True se usar HTTPS (produção)
-
-CORS(app, supports_credentials=True)
-
-# --- Optional Redis (Upstash) support for daily counter ---
-redis_client = None
-REDIS_URL = os.environ.get('REDIS_URL') or os.environ.get('UPSTASH_REDIS_URL')
-if REDIS_URL:
-    try:
-        redis_client = redis.from_url(REDIS_URL, decode_responses=True)
-        # Test connection
-        redis_client.ping()
-        print("Connected to Redis for daily counters.")
-    except Exception as e:
-        print(f"WARN: Could not connect to Redis at {REDIS_URL}: {e}")
-        redis_client = None
-
-# --- Funções e Tabela de Estatísticas Diárias ---
-def ensure_daily_stats_table():
-    try:
-        conn = sqlite3.connect(DATABASE_FILE)
-        cur = conn.cursor()
-        cur.execute('''
-        CREATE TABLE IF NOT EXISTS daily_stats (
-            date TEXT PRIMARY KEY,
-            solution_name TEXT,
-            correct_count INTEGER DEFAULT 0
-        )
-        ''')
-        conn.commit()
-    except Exception as e:
-        print(f"ERRO ao criar/verificar tabela daily_stats: {e}")
-    finally:
-        try:
-            conn.close()
-        except:
-            pass
-
-
-def increment_today_correct_count(solution_name):
-    today = datetime.utcnow().date().isoformat()
-    # Try Redis first if available
-    if redis_client:
-        try:
-            key = f"eternaldle:daily:{today}:count"
-            new = redis_client.incr(key)
-            # store solution name for reference (non-critical)
-            try:
-                redis_client.set(f"eternaldle:daily:{today}:solution", solution_name)
-            except Exception:
-                pass
-            return int(new)
-        except Exception as e:
-            print(f"ERRO increment_today_correct_count (redis): {e}")
-            # fallback to sqlite
-
-    try:
-        conn = sqlite3.connect(DATABASE_FILE)
-        cur = conn.cursor()
-        cur.execute('''
-            INSERT INTO daily_stats (date, solution_name, correct_count)
-            VALUES (?, ?, 1)
-            ON CONFLICT(date) DO UPDATE SET
-                correct_count = correct_count + 1,
-                solution_name = excluded.solution_name
-        ''', (today, solution_name))
-        conn.commit()
-        cur.execute('SELECT correct_count FROM daily_stats WHERE date = ?', (today,))
-        row = cur.fetchone()
-        conn.close()
-        return row[0] if row else 0
-    except Exception as e:
-        print(f"ERRO increment_today_correct_count: {e}")
-        try:
-            conn.close()
-        except:
-            pass
-        return None
-
-
-def get_today_correct_count():
-    today = datetime.utcnow().date().isoformat()
-    # Try Redis first if available
-    if redis_client:
-        try:
-            key = f"eternaldle:daily:{today}:count"
-            val = redis_client.get(key)
-            return int(val) if val else 0
-        except Exception as e:
-            print(f"ERRO get_today_correct_count (redis): {e}")
-            # fallback to sqlite
-
-    try:
-        conn = sqlite3.connect(DATABASE_FILE)
-        cur = conn.cursor()
-        cur.execute('SELECT correct_count FROM daily_stats WHERE date = ?', (today,))
-        row = cur.fetchone()
-        conn.close()
-        return row[0] if row else 0
-    except Exception as e:
-        print(f"ERRO get_today_correct_count: {e}")
-        try:
-            conn.close()
-        except:
-            pass
-        return 0
-
-# Ensure table exists at startup
-ensure_daily_stats_table()
-
-# --- Funções da Base de Dados ---
-def get_all_characters():
-    """Busca todos os dados dos personagens da base de dados SQLite."""
-    if not os.path.exists(DATABASE_FILE):
-        return None
-    try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT winners_count FROM daily_stats WHERE data = ?", (today,))
-        row = cur.fetchone()
-        conn.close()
-        return row['winners_count'] if row else 0
-    except Exception as e:
-        print(f"Erro ao obter contagem: {e}")
-        return 0
-
-# --- Rotas da API ---
-
-
-# Static files are served from the 'static/' folder by Flask. Removed custom /style.css route.
-
-
-@app.route('/favicon.ico')
-def serve_favicon():
-    """Serve um favicon se existir; caso contrário retorna 204 (sem conteúdo)."""
-    favicon_path = os.path.join(project_root, 'favicon.ico')
-    if os.path.exists(favicon_path):
-        return send_from_directory(project_root, 'favicon.ico')
-    return ('', 204)
-
-@app.route('/api/start_game', methods=['POST'])
-def start_game():
-    """Inicializa o jogo e seleciona o personagem do dia baseado na data."""
-    try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT * FROM eternaldle")
-        all_characters = [dict(row) for row in cur.fetchall()]
-        conn.close()
-
-        if not all_characters:
-            return jsonify({'error': 'A base de dados está vazia.'}), 500
-
-        # Ordenar alfabeticamente para garantir que o índice seja consistente em todos os clientes
-        sorted_characters = sorted(all_characters, key=lambda x: x['NOME'])
-        
-        # Lógica de seleção diária: muda o personagem a cada 24 horas
-        epoch = datetime(2024, 1, 1)
-        today = datetime.utcnow()
-        days_since_epoch = (today - epoch).days
-        
-        character_index = days_since_epoch % len(sorted_characters)
-        solution_character = sorted_characters[character_index]
-        
-        # Persist session guesses until the daily solution changes
-        today = datetime.utcnow().date().isoformat()
-        # If the session is for a previous day, clear stored guesses and win flag
-        if session.get('solution_date') != today:
-            session['guesses'] = []
-            session.pop('won_date', None)
-        session['solution'] = dict(solution_character)
-        session['solution_date'] = today
-        session.modified = True
-
-        character_names = [char['NOME'] for char in all_characters]
-        previous_guesses = session.get('guesses', [])
-        has_won = session.get('won_date') == today
-        today_count = get_today_correct_count()
-
-        return jsonify({
-            'characterNames': character_names,
-            'previousGuesses': previous_guesses,
-            'hasWon': has_won,
-            'todayCorrectCount': today_count
-        })
-
-    except Exception as e:
-        traceback.print_exc()
-        return jsonify({'error': 'Erro no servidor ao iniciar jogo.'}), 500
-
-@app.route('/api/record_win', methods=['POST'])
-def record_win():
-    """Regista que um utilizador acertou no personagem de hoje."""
-    if 'solution' not in session:
-        return jsonify({'error': 'Sessão inválida.'}), 400
-    
-    # Evita incrementos múltiplos do mesmo utilizador na mesma sessão
-    if session.get('has_won_today'):
-        return jsonify({'winnersToday': get_winners_count()})
-
-    today = get_today_str()
-    try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        
-        # Incrementa o contador ou cria o registo para o novo dia
-        cur.execute("""
-            INSERT INTO daily_stats (data, winners_count) 
-            VALUES (?, 1) 
-            ON CONFLICT(data) DO UPDATE SET winners_count = winners_count + 1
-        """, (today,))
-        
-        conn.commit()
-        conn.close()
-        
-        session['has_won_today'] = True
-        return jsonify({'winnersToday': get_winners_count()})
-    except Exception as e:
-        print(f"Erro ao gravar vitória: {e}")
-        return jsonify({'error': 'Erro ao atualizar estatísticas.'}), 500
-
-@app.route('/api/guess', methods=['POST'])
-def handle_guess():
-    """Valida o palpite do utilizador e compara com a solução da sessão."""
-    if 'solution' not in session:
-        return jsonify({'error': 'Jogo não iniciado.'}), 400
-
-    data = request.get_json()
-    guess_name = data.get('guess', '').strip()
-    solution = session['solution']
-    
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM eternaldle WHERE NOME = ?", (guess_name,))
-    row = cur.fetchone()
-    conn.close()
-    
-    if not row:
-        return jsonify({'error': 'Personagem não encontrado.'}), 404
-
-    guess_character = dict(row)
-    results = {}
-    is_correct = (guess_character['NOME'].lower() == solution['NOME'].lower())
-    
-    # Lógica de comparação de atributos
-    for key in solution.keys():
-        if key in ['IMAGEM_URL']: continue
-        
-        guess_value = guess_character.get(key)
-        solution_value = solution.get(key)
-        status = 'incorrect'
-        
-        if str(guess_value).lower() == str(solution_value).lower():
-            status = 'correct'
-        elif key in ['ANO_DE_LANCAMENTO', 'QUANTIDADE_DE_ARMA']:
-            try:
-                if int(guess_value) < int(solution_value): status = 'higher'
-                elif int(guess_value) > int(solution_value): status = 'lower'
-            except: status = 'incorrect'
-        elif key in ['CLASSE', 'ALCANCE']:
-            guess_parts = {part.strip().lower() for part in str(guess_value).split(',')}
-            solution_parts = {part.strip().lower() for part in str(solution_value).split(',')}
-            if guess_parts.intersection(solution_parts): status = 'partial'
-            
-        results[key.lower()] = {'value': guess_value, 'status': status}
-    
-    results['imagem_url'] = {'value': guess_character['IMAGEM_URL']}
-
-    # If the guess is correct, increment (once per-session per-day) and return today's correct count
-    today_count = None
-    if is_correct:
-        today_str = datetime.utcnow().date().isoformat()
-        # Prevent double-counting from the same session
-        if session.get('won_date') != today_str:
-            new_count = increment_today_correct_count(solution['NOME'])
-            session['won_date'] = today_str
-            today_count = new_count
-        else:
-            today_count = get_today_correct_count()
-
-    response = {'results': results, 'isCorrect': is_correct}
-    if today_count is not None:
-        response['todayCorrectCount'] = today_count
-
-    # Persist this guess in the session (avoid duplicates in the same session)
-    try:
-        guesses = session.get('guesses', [])
-        guess_entry = {'guess': guess_name, 'results': results, 'isCorrect': is_correct}
-        if not any(g.get('guess', '').lower() == guess_name.lower() for g in guesses):
-            guesses.append(guess_entry)
-            session['guesses'] = guesses
-            session.modified = True
-    except Exception as e:
-        print(f"Warning: could not persist guess in session: {e}")
-
-    return jsonify(response)
-
-# Admin endpoint to migrate existing SQLite daily_stats into Redis (protected by MIGRATE_TOKEN)
-@app.route('/admin/migrate_counts', methods=['POST'])
-def migrate_counts():
-    token = request.headers.get('Authorization', '').split()[-1]
-    if token != os.environ.get('MIGRATE_TOKEN'):
-        return ('Forbidden', 403)
-    if not redis_client:
-        return ('Redis not configured', 400)
-    try:
-        conn = sqlite3.connect(DATABASE_FILE)
-        cur = conn.cursor()
-        cur.execute('SELECT date, correct_count, solution_name FROM daily_stats')
-        rows = cur.fetchall()
-        conn.close()
-        for date, count, sol in rows:
-            key = f"eternaldle:daily:{date}:count"
-            redis_client.set(key, int(count))
-            if sol:
-                redis_client.set(f"eternaldle:daily:{date}:solution", sol)
-        return ('OK', 200)
-    except Exception as e:
-        print(f"Migration error: {e}")
-        return ('Internal Error', 500)
-
-if __name__ == '__main__':
-    # Garante que a base de dados existe antes de arrancar (opcional se usar setup_database.py)
+import hmac
+import json
+import os
+import sys
+import time
+import traceback
+from datetime import date, datetime, timedelta  # Importa a biblioteca de data e hora
+from flask import Flask, Response, jsonify, session, request, stream_with_context
+from flask_cors import CORS
+from flask.json.provider import DefaultJSONProvider
+from flask.sessions import SecureCookieSessionInterface
+from catalog import get_catalog, day_number
+import game_state
+from counters import WinCounter
+import assets
+import counts_migration
+import db
+from db import get_db_connection
+import names
+import practice
+from precompressed import matching_etag, pick_encoding, variant_etag
+from live import TodayBroadcaster
+from redis_backend import ResilientRedis
+from metrics import REGISTRY, REQUEST_DURATION, SESSION_COOKIE_BYTES, STAGE_DURATION
+
+app = Flask(__name__)
+
+# Configuração de caminhos
+project_root = os.path.dirname(os.path.abspath(__file__))
+DATABASE_FILE = db.DATABASE_FILE
+
+# Configuração de Sessão e Segurança
+app.config['SECRET_KEY'] = 'a_chave_secreta_super_dificil_de_adivinhar'
+app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
+app.config['SESSION_COOKIE_SECURE'] = False  # Definir como True se usar HTTPS (produção)
+
+CORS(app, supports_credentials=True)
+
+# --- Instrumentação (ver metrics.py e /admin/metrics) ---
+class TimedSessionInterface(SecureCookieSessionInterface):
+    """Mede a leitura/assinatura do cookie de sessão e o tamanho do cookie enviado."""
+
+    def open_session(self, app, request):
+        with STAGE_DURATION.time(stage='session_open'):
+            return super().open_session(app, request)
+
+    def save_session(self, app, session, response):
+        with STAGE_DURATION.time(stage='session_save'):
+            super().save_session(app, session, response)
+        prefix = app.config['SESSION_COOKIE_NAME'] + '='
+        for cookie in response.headers.getlist('Set-Cookie'):
+            if cookie.startswith(prefix):
+                SESSION_COOKIE_BYTES.observe(len(cookie))
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Mede a serialização JSON das respostas."""
+
+    def dumps(self, obj, **kwargs):
+        with STAGE_DURATION.time(stage='json_encode'):
+            return super().dumps(obj, **kwargs)
+
+
+class RequestTimingMiddleware:
+    """Middleware WSGI: tempo total de cada pedido, incluindo sessão e serialização."""
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        started = time.perf_counter()
+        status = ['500']
+
+        def timed_start_response(status_line, headers, exc_info=None):
+            status[0] = status_line.split(' ', 1)[0]
+            return start_response(status_line, headers, exc_info)
+
+        try:
+            return self.wsgi_app(environ, timed_start_response)
+        finally:
+            REQUEST_DURATION.observe(time.perf_counter() - started,
+                                     endpoint=environ.get('eternaldle.endpoint', 'unknown'),
+                                     method=environ.get('REQUEST_METHOD', ''),
+                                     status=status[0])
+
+
+app.session_interface = TimedSessionInterface()
+app.json = TimedJSONProvider(app)
+app.wsgi_app = RequestTimingMiddleware(app.wsgi_app)
+
+
+@app.before_request
+def tag_endpoint():
+    # Etiqueta das métricas: o endpoint (cardinalidade fixa), nunca o caminho
+    request.environ['eternaldle.endpoint'] = request.endpoint or 'unknown'
+
+
+def bearer_token_ok(*env_names):
+    """Valida `Authorization: Bearer <token>` contra o primeiro token configurado em `env_names`."""
+    return authorization_matches(request.headers.get('Authorization', ''), *env_names)
+
+
+def authorization_matches(authorization, *env_names):
+    """Compara o token de um cabeçalho Authorization (também usado pelo asgi.py)."""
+    parts = authorization.split()
+    token = parts[-1] if parts else ''
+    for name in env_names:
+        expected = os.environ.get(name)
+        if expected:
+            return hmac.compare_digest(token, expected)
+    return False
+
+# --- Optional Redis (Upstash) support for daily counter ---
+# Ligação preguiçosa, com timeouts curtos e disjuntor (ver redis_backend.py): o arranque
+# do worker não contacta o Redis e, com o Redis em baixo, os pedidos vão direto ao SQLite.
+redis_client = None
+REDIS_URL = os.environ.get('REDIS_URL') or os.environ.get('UPSTASH_REDIS_URL')
+if REDIS_URL:
+    redis_client = ResilientRedis(REDIS_URL)
+
+# --- Funções e Tabela de Estatísticas Diárias ---
+def ensure_daily_stats_table():
+    """Aplica as migrações de esquema (inclui a tabela daily_stats unificada)."""
+    try:
+        db.migrate(DATABASE_FILE)
+    except Exception as e:
+        print(f"ERRO ao criar/verificar tabela daily_stats: {e}")
+
+
+# Contador diário com escrita diferida: agrega os acertos em memória e envia-os em lote
+win_counter = WinCounter(redis_client, DATABASE_FILE)
+
+
+def increment_today_correct_count(solution_name, guesses=None):
+    """Regista um acerto de hoje e devolve a contagem (estimada localmente até ao próximo envio)."""
+    try:
+        return win_counter.increment(solution_name, guesses=guesses)
+    except Exception as e:
+        print(f"ERRO increment_today_correct_count: {e}")
+        return None
+
+
+def get_today_correct_count():
+    """Contagem de acertos de hoje, com desatualização limitada a counters.CACHE_TTL."""
+    try:
+        return win_counter.get()
+    except Exception as e:
+        print(f"ERRO get_today_correct_count: {e}")
+        return 0
+
+# Uma única leitura por tick para todos os clientes de /api/stream/today deste worker
+today_broadcaster = TodayBroadcaster(get_today_correct_count, redis_client)
+
+# Ensure table exists at startup
+ensure_daily_stats_table()
+
+# --- Funções da Base de Dados ---
+def get_winners_count():
+    """Número de utilizadores que acertaram no personagem de hoje."""
+    return get_today_correct_count()
+
+# --- Rotas da API ---
+
+
+# --- Página e ficheiros estáticos ---
+# O build (python assets.py) gera static/dist/ com nomes por conteúdo; tudo é lido
+# uma única vez aqui. Sem build, o Flask continua a servir static/ diretamente.
+asset_manifest = assets.AssetManifest()
+index_page = assets.load_page(os.path.join(project_root, 'eternaldle.html'), asset_manifest)
+favicon = assets.load_optional(os.path.join(project_root, 'favicon.ico'), 'image/x-icon')
+
+# A página muda a cada deploy: cache curta e revalidação com ETag
+PAGE_CACHE = 'public, max-age=60'
+ASSET_CACHE_IMMUTABLE = 'public, max-age=31536000, immutable'
+FAVICON_CACHE = 'public, max-age=86400'
+
+
+def precompressed_response(variants, etag, mimetype, headers):
+    """Resposta com a variante pré-comprimida aceite pelo cliente e ETag/304 por codificação."""
+    encoding = pick_encoding(request.accept_encodings, variants)
+    matched = matching_etag(request.if_none_match, etag, variants, encoding)
+    if matched:
+        response = Response(status=304, headers=headers)
+        response.set_etag(matched)
+        return response
+    response = Response(variants[encoding], mimetype=mimetype, headers=headers)
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.set_etag(variant_etag(etag, encoding))
+    return response
+
+
+def serve_static_asset(asset, cache_control):
+    """Resposta com ETag/304 e a variante pré-comprimida aceite pelo cliente."""
+    headers = {'Cache-Control': cache_control, 'Vary': 'Accept-Encoding'}
+    return precompressed_response(asset.variants, asset.etag, asset.mimetype, headers)
+
+
+@app.route('/')
+def serve_index():
+    return serve_static_asset(index_page, PAGE_CACHE)
+
+
+@app.route('/static/dist/<name>')
+def serve_dist_asset(name):
+    """Ficheiros do build: o nome muda com o conteúdo, por isso a cache nunca expira."""
+    asset = asset_manifest.files.get(name)
+    if asset is None:
+        return ('', 404)
+    return serve_static_asset(asset, ASSET_CACHE_IMMUTABLE)
+
+
+@app.route('/favicon.ico')
+def serve_favicon():
+    """Serve o favicon lido no arranque; sem ficheiro retorna 204 (sem conteúdo)."""
+    if favicon is None:
+        return ('', 204)
+    return serve_static_asset(favicon, FAVICON_CACHE)
+
+@app.route('/api/start_game', methods=['POST'])
+def start_game():
+    """Inicializa o jogo e seleciona o personagem do dia baseado na data."""
+    try:
+        catalog = get_catalog()
+
+        if not catalog:
+            return jsonify({'error': 'A base de dados está vazia.'}), 500
+
+        # Personagem do dia vem do calendário pré-calculado no catálogo
+        today = day_number()
+
+        # Persist session guesses until the daily solution changes
+        # If the session is for a previous day, clear stored guesses and win flag
+        if session.get('day') != today:
+            game_state.reset_state(session, catalog, today)
+
+        # A sessão guarda só índices; os resultados são reconstruídos a partir do catálogo
+        solution_idx = game_state.solution_index(session, catalog)
+        previous_guesses = [
+            game_state.guess_entry(catalog, i, solution_idx)
+            for i in game_state.load_guesses(session, catalog)
+        ]
+        has_won = session.get('won') == today
+        today_count = get_today_correct_count()
+
+        # A lista de nomes vem de GET /api/characters?v=<catalogVersion> (em cache no browser)
+        return jsonify({
+            'catalogVersion': catalog.version,
+            'previousGuesses': previous_guesses,
+            'hasWon': has_won,
+            'todayCorrectCount': today_count
+        })
+
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({'error': 'Erro no servidor ao iniciar jogo.'}), 500
+
+# Cache longa quando o URL inclui a versão do catálogo; curta caso contrário
+CHARACTERS_CACHE_VERSIONED = 'public, max-age=31536000, immutable'
+CHARACTERS_CACHE_DEFAULT = 'public, max-age=300'
+
+@app.route('/api/characters', methods=['GET'])
+def get_characters():
+    """Lista de nomes do catálogo, com ETag e corpo pré-comprimido."""
+    catalog = get_catalog()
+    if not catalog:
+        return jsonify({'error': 'A base de dados está vazia.'}), 500
+
+    versioned = request.args.get('v') == catalog.version
+    headers = {
+        'Cache-Control': CHARACTERS_CACHE_VERSIONED if versioned else CHARACTERS_CACHE_DEFAULT,
+        'Vary': 'Accept-Encoding',
+    }
+    return precompressed_response(catalog.characters_payload, catalog.version, 'application/json', headers)
+
+@app.route('/api/suggest', methods=['GET'])
+def suggest_names():
+    """Sugestões de nomes por prefixo (sem maiúsculas nem acentos).
+
+    `?q=` é o texto escrito, `?limit=` o número máximo de nomes e, com
+    `?exclude_guessed=1`, os nomes já chutados nesta sessão ficam de fora.
+    """
+    catalog = get_catalog()
+    if not catalog:
+        return jsonify({'error': 'A base de dados está vazia.'}), 500
+
+    limit = min(request.args.get('limit', names.DEFAULT_LIMIT, type=int), names.MAX_LIMIT)
+    exclude = ()
+    if request.args.get('exclude_guessed') in ('1', 'true'):
+        exclude = frozenset(game_state.load_guesses(session, catalog))
+
+    with STAGE_DURATION.time(stage='suggest'):
+        found = catalog.name_index.suggest(request.args.get('q', ''), limit, exclude)
+    response = jsonify({'suggestions': [catalog.names[i] for i in found]})
+    # A resposta depende só do catálogo, exceto quando exclui os palpites da sessão
+    response.headers['Cache-Control'] = 'private, no-cache' if exclude else 'public, max-age=300'
+    return response
+
+def concurrent_worker(environ):
+    """True se o worker serve outros pedidos enquanto um stream está aberto (threads ou greenlets).
+
+    Num worker síncrono do gunicorn cada ligação SSE ocuparia o worker
+    inteiro durante live.MAX_STREAM_SECONDS.
+    """
+    if environ.get('wsgi.multithread'):
+        return True
+    gevent_monkey = sys.modules.get('gevent.monkey')
+    if gevent_monkey is not None and gevent_monkey.is_module_patched('socket'):
+        return True
+    eventlet_patcher = sys.modules.get('eventlet.patcher')
+    return eventlet_patcher is not None and eventlet_patcher.is_monkey_patched('socket')
+
+@app.route('/api/stream/today', methods=['GET'])
+def stream_today():
+    """Server-Sent Events com a contagem de acertos de hoje."""
+    if not concurrent_worker(request.environ):
+        return jsonify({'error': 'Contagem em direto indisponível neste servidor.'}), 503
+    events = today_broadcaster.stream()
+    if events is None:
+        return jsonify({'error': 'Demasiadas ligações em direto.'}), 503
+    response = Response(stream_with_context(events), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+    # Devolve o lugar do cliente mesmo que o stream nunca seja iterado (ex.: HEAD)
+    response.call_on_close(events.close)
+    return response
+
+# Histograma de hoje: cache curta no worker (counters.STATS_CACHE_TTL) e no browser
+STATS_CACHE_TODAY = 'public, max-age=5'
+STATS_CACHE_PAST = 'public, max-age=3600'
+# Número máximo de dias num pedido de /api/stats
+MAX_STATS_DAYS = 366
+
+@app.route('/api/stats/today', methods=['GET'])
+def stats_today():
+    """Acertos de hoje e histograma de palpites até acertar.
+
+    `guessHistogram[i]` é o número de vencedores que precisaram de i+1
+    palpites; a última posição conta também os valores acima.
+    """
+    today = datetime.utcnow().date().isoformat()
+    try:
+        histogram = win_counter.histogram(today)
+    except Exception as e:
+        print(f"ERRO stats_today: {e}")
+        return jsonify({'error': 'Erro ao obter estatísticas.'}), 500
+    response = jsonify({
+        'date': today,
+        'correctCount': get_today_correct_count(),
+        'guessHistogram': histogram,
+    })
+    response.headers['Cache-Control'] = STATS_CACHE_TODAY
+    return response
+
+@app.route('/api/stats', methods=['GET'])
+def stats_range():
+    """Estatísticas de vários dias (`?from=AAAA-MM-DD&to=AAAA-MM-DD`) numa única leitura do backend."""
+    today = datetime.utcnow().date()
+    try:
+        end = date.fromisoformat(request.args['to']) if 'to' in request.args else today
+        start = date.fromisoformat(request.args['from']) if 'from' in request.args else end - timedelta(days=6)
+    except ValueError:
+        return jsonify({'error': 'Data inválida.'}), 400
+    if start > end:
+        return jsonify({'error': 'Intervalo inválido.'}), 400
+    if (end - start).days >= MAX_STATS_DAYS:
+        return jsonify({'error': 'Intervalo demasiado longo.'}), 413
+
+    days = [(start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1)]
+    history = win_counter.history(days)
+    if history is None:
+        return jsonify({'error': 'Erro ao obter estatísticas.'}), 500
+    response = jsonify({'days': [
+        {'date': day, 'correctCount': history[day][0], 'guessHistogram': history[day][1]}
+        for day in days
+    ]})
+    # Dias passados já não mudam
+    response.headers['Cache-Control'] = STATS_CACHE_PAST if end < today else STATS_CACHE_TODAY
+    return response
+
+@app.route('/api/record_win', methods=['POST'])
+def record_win():
+    """Regista que um utilizador acertou no personagem de hoje."""
+    if session.get('day') is None:
+        return jsonify({'error': 'Sessão inválida.'}), 400
+    
+    # Evita incrementos múltiplos do mesmo utilizador na mesma sessão (partilhado com /api/guess)
+    today = day_number()
+    if session.get('won') == today:
+        return jsonify({'winnersToday': get_winners_count()})
+
+    catalog = get_catalog()
+    if not catalog:
+        return jsonify({'error': 'Erro ao atualizar estatísticas.'}), 500
+
+    solution_idx = game_state.solution_index(session, catalog)
+    guesses = game_state.guesses_to_solve(session, catalog, [], solution_idx)
+    if guesses is None:
+        # A sessão ainda não chutou a solução: não há vitória para contar
+        return jsonify({'error': 'Personagem de hoje ainda não adivinhado.'}), 400
+    winners = increment_today_correct_count(catalog.names[solution_idx], guesses)
+    if winners is None:
+        return jsonify({'error': 'Erro ao atualizar estatísticas.'}), 500
+
+    session['won'] = today
+    return jsonify({'winnersToday': winners})
+
+def register_win(catalog, solution_idx, guess_indices):
+    """Conta a vitória da sessão uma única vez por dia e devolve a contagem de hoje.
+
+    `guess_indices` são os palpites deste pedido (ainda não gravados na sessão),
+    usados para saber em quantos palpites a sessão acertou.
+    """
+    today = day_number()
+    # Prevent double-counting from the same session
+    if session.get('won') != today:
+        guesses = game_state.guesses_to_solve(session, catalog, guess_indices, solution_idx)
+        new_count = increment_today_correct_count(catalog.names[solution_idx], guesses)
+        session['won'] = today
+        return new_count
+    return get_today_correct_count()
+
+@app.route('/api/guess', methods=['POST'])
+def handle_guess():
+    """Valida o palpite do utilizador e compara com a solução da sessão."""
+    catalog = get_catalog()
+    if session.get('day') is None or not catalog:
+        return jsonify({'error': 'Jogo não iniciado.'}), 400
+
+    data = request.get_json()
+    guess_name = data.get('guess', '').strip()
+    solution_idx = game_state.solution_index(session, catalog)
+
+    # Aceita o nome sem acentos/maiúsculas ("li dailin" -> "Li Dailin")
+    guess_idx = catalog.resolve_name(guess_name)
+    if guess_idx is None:
+        return jsonify({'error': 'Personagem não encontrado.'}), 404
+
+    is_correct = guess_idx == solution_idx
+
+    # Resultado pré-calculado na matriz do catálogo
+    with STAGE_DURATION.time(stage='guess_eval'):
+        results = catalog.feedback.results(guess_idx, solution_idx)
+
+    # If the guess is correct, increment (once per-session per-day) and return today's correct count
+    today_count = register_win(catalog, solution_idx, [guess_idx]) if is_correct else None
+
+    response = {'guess': catalog.names[guess_idx], 'results': results, 'isCorrect': is_correct}
+    if today_count is not None:
+        response['todayCorrectCount'] = today_count
+
+    # Persist this guess in the session (avoid duplicates in the same session)
+    try:
+        game_state.add_guess(session, catalog, guess_idx)
+    except Exception as e:
+        print(f"Warning: could not persist guess in session: {e}")
+
+    return jsonify(response)
+
+# Número máximo de palpites aceites num pedido em lote
+MAX_BATCH_GUESSES = 200
+
+@app.route('/api/guesses:batch', methods=['POST'])
+def handle_guess_batch():
+    """Avalia vários palpites num só pedido (ex.: restaurar o tabuleiro a partir do localStorage).
+
+    Aceita {"guesses": [nomes]} e devolve {"results": [...], "isCorrect": bool}
+    ou, com `Accept: application/x-ndjson`, uma linha JSON por palpite.
+    A sessão é atualizada uma única vez e a vitória contada no máximo uma vez.
+    """
+    catalog = get_catalog()
+    if session.get('day') is None or not catalog:
+        return jsonify({'error': 'Jogo não iniciado.'}), 400
+
+    data = request.get_json(silent=True)
+    guess_names = data.get('guesses') if isinstance(data, dict) else data
+    if not isinstance(guess_names, list):
+        return jsonify({'error': 'Pedido inválido.'}), 400
+    if len(guess_names) > MAX_BATCH_GUESSES:
+        return jsonify({'error': 'Demasiados palpites.'}), 413
+
+    solution_idx = game_state.solution_index(session, catalog)
+    entries = []
+    valid_indices = []
+    for name in guess_names:
+        guess_name = str(name).strip()
+        guess_idx = catalog.resolve_name(guess_name)
+        if guess_idx is None:
+            entries.append({'guess': guess_name, 'error': 'Personagem não encontrado.'})
+            continue
+        valid_indices.append(guess_idx)
+        entries.append(game_state.guess_entry(catalog, guess_idx, solution_idx))
+
+    is_correct = solution_idx in valid_indices
+    today_count = register_win(catalog, solution_idx, valid_indices) if is_correct else None
+
+    # Persist all guesses in the session at once
+    try:
+        game_state.add_guesses(session, catalog, valid_indices)
+    except Exception as e:
+        print(f"Warning: could not persist guesses in session: {e}")
+
+    if request.accept_mimetypes.best == 'application/x-ndjson':
+        lines = [json.dumps(entry, ensure_ascii=False) for entry in entries]
+        summary = {'isCorrect': is_correct}
+        if today_count is not None:
+            summary['todayCorrectCount'] = today_count
+        lines.append(json.dumps(summary))
+        return Response('\n'.join(lines) + '\n', mimetype='application/x-ndjson')
+
+    response = {'results': entries, 'isCorrect': is_correct}
+    if today_count is not None:
+        response['todayCorrectCount'] = today_count
+    return jsonify(response)
+
+# --- Modo de treino (practice.py) ---
+# A ronda vive num token assinado: sem sessão, sem base de dados e sem contadores.
+
+def practice_round(catalog, token):
+    """Índice da solução de um token de treino, ou (resposta de erro, status)."""
+    parsed = practice.read_token(app.config['SECRET_KEY'], token)
+    if parsed is None:
+        return None, (jsonify({'error': 'Ronda de treino inválida.'}), 400)
+    seed, version = parsed
+    if version != catalog.version:
+        # O catálogo mudou: o mesmo seed já não aponta para o mesmo personagem
+        return None, (jsonify({'error': 'Ronda de treino expirada.'}), 409)
+    return practice.solution_index(app.config['SECRET_KEY'], catalog, seed), None
+
+@app.route('/api/practice/start', methods=['POST'])
+def practice_start():
+    """Nova ronda de treino com um personagem aleatório."""
+    catalog = get_catalog()
+    if not catalog:
+        return jsonify({'error': 'A base de dados está vazia.'}), 500
+    return jsonify({
+        'token': practice.issue_token(app.config['SECRET_KEY'], catalog),
+        'catalogVersion': catalog.version,
+    })
+
+@app.route('/api/practice/guess', methods=['POST'])
+def practice_guess():
+    """Avalia um palpite de treino: {"token", "guess"} -> resultados (não conta para as estatísticas)."""
+    catalog = get_catalog()
+    if not catalog:
+        return jsonify({'error': 'A base de dados está vazia.'}), 500
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Pedido inválido.'}), 400
+    solution_idx, error = practice_round(catalog, data.get('token'))
+    if error:
+        return error
+
+    guess_idx = catalog.resolve_name(str(data.get('guess', '')).strip())
+    if guess_idx is None:
+        return jsonify({'error': 'Personagem não encontrado.'}), 404
+    with STAGE_DURATION.time(stage='guess_eval'):
+        results = catalog.feedback.results(guess_idx, solution_idx)
+    return jsonify({'guess': catalog.names[guess_idx], 'results': results,
+                    'isCorrect': guess_idx == solution_idx})
+
+@app.route('/api/practice/reveal', methods=['POST'])
+def practice_reveal():
+    """Desiste da ronda de treino e mostra a solução."""
+    catalog = get_catalog()
+    if not catalog:
+        return jsonify({'error': 'A base de dados está vazia.'}), 500
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Pedido inválido.'}), 400
+    solution_idx, error = practice_round(catalog, data.get('token'))
+    if error:
+        return error
+    return jsonify({'solution': catalog.names[solution_idx]})
+
+# Admin endpoint to migrate existing SQLite daily_stats into Redis (protected by MIGRATE_TOKEN).
+# `?direction=to-sqlite` copies the Redis snapshot back into SQLite.
+@app.route('/admin/migrate_counts', methods=['POST'])
+def migrate_counts():
+    if not bearer_token_ok('MIGRATE_TOKEN'):
+        return ('Forbidden', 403)
+    if not redis_client:
+        return ('Redis not configured', 400)
+    # Migrações longas: preferir `python counts_migration.py` fora do pedido HTTP
+    try:
+        if request.args.get('direction') == 'to-sqlite':
+            conn = get_db_connection(DATABASE_FILE)
+            counts_migration.redis_to_sqlite(redis_client, conn, progress=None)
+        else:
+            conn = get_db_connection(DATABASE_FILE, readonly=True)
+            counts_migration.sqlite_to_redis(conn, redis_client, progress=None)
+        return ('OK', 200)
+    except Exception as e:
+        print(f"Migration error: {e}")
+        return ('Internal Error', 500)
+
+# Métricas deste worker no formato do Prometheus (METRICS_TOKEN, ou MIGRATE_TOKEN se não definido)
+@app.route('/admin/metrics', methods=['GET'])
+def admin_metrics():
+    if not bearer_token_ok('METRICS_TOKEN', 'MIGRATE_TOKEN'):
+        return ('Forbidden', 403)
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+# Relatório de analytics.py para o catálogo em uso (ANALYTICS_TOKEN, ou MIGRATE_TOKEN se não definido).
+# O primeiro pedido de cada versão do catálogo calcula a matriz; os seguintes usam a cache.
+ANALYTICS_MAX_TOP = 100
+ANALYTICS_MAX_DAYS = 366
+
+@app.route('/admin/analytics', methods=['GET'])
+def admin_analytics():
+    if not bearer_token_ok('ANALYTICS_TOKEN', 'MIGRATE_TOKEN'):
+        return ('Forbidden', 403)
+    top = request.args.get('top', 10, type=int)
+    days = request.args.get('days', 30, type=int)
+    if not 0 <= top <= ANALYTICS_MAX_TOP or not 0 <= days <= ANALYTICS_MAX_DAYS:
+        return jsonify({'error': 'Parâmetros inválidos.'}), 400
+    catalog = get_catalog()
+    if not catalog:
+        return jsonify({'error': 'A base de dados está vazia.'}), 500
+    # Importado só aqui: o NumPy é opcional e não deve pesar no arranque dos workers
+    import analytics
+    if analytics.np is None:
+        return jsonify({'error': 'Análise indisponível (NumPy não instalado).'}), 503
+    return jsonify(analytics.get_report(catalog).to_dict(top=top, days=days))
+
+if __name__ == '__main__':
+    # Garante que a base de dados existe antes de arrancar (opcional se usar setup_database.py)
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
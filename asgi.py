@@ -0,0 +1,586 @@
+"""Entrada ASGI opcional, com os mesmos contratos e a mesma sessão do app.py.
+
+    uvicorn asgi:app --workers 4
+    gunicorn -k uvicorn.workers.UvicornWorker asgi:app
+
+(o uvicorn não faz parte do requirements.txt; o app.py/WSGI continua a ser
+a forma normal de correr o jogo.)
+
+/api/start_game, /api/guess, /admin/migrate_counts e /api/stream/today são
+servidos diretamente no event loop:
+
+    - o cookie de sessão é lido e escrito com o serializador do Flask
+      (mesmo formato, mesma SECRET_KEY: uma sessão passa de um modo para o outro);
+    - a contagem de hoje é lida com o cliente asyncio do Redis, respeitando
+      o disjuntor do redis_backend; os acertos são agregados no mesmo
+      counters.WinCounter (a thread de envio corre fora do event loop);
+    - o SQLite (catálogo, leituras de recurso, migrações) corre num pool de
+      threads limitado (ASGI_SQLITE_THREADS);
+    - os clientes SSE não ocupam threads: esperam no event loop, avisados
+      pelo live.TodayBroadcaster da app Flask.
+
+Os restantes pedidos passam para a app Flask num segundo pool de threads
+(ASGI_WSGI_THREADS), por isso o resto da API e a página continuam disponíveis.
+Cada pedido encaminhado corre do início ao fim (incluindo a iteração e o
+close() da resposta) numa só thread.
+"""
+import asyncio
+import io
+import os
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import parse_qs
+
+from flask.sessions import SecureCookieSession
+from itsdangerous import BadSignature
+from werkzeug.exceptions import BadRequest, HTTPException, InternalServerError, RequestEntityTooLarge, UnsupportedMediaType
+from werkzeug.http import dump_cookie, parse_cookie
+
+import app as wsgi
+import counts_migration
+import game_state
+import live
+from catalog import day_number, get_catalog
+from counters import redis_count_key
+from db import get_db_connection
+from metrics import BACKEND_DURATION, ERRORS, REDIS_FALLBACKS, REQUEST_DURATION, SESSION_COOKIE_BYTES, STAGE_DURATION
+from redis_backend import CONNECTION_ERRORS
+
+# Threads para o SQLite (cada thread reutiliza as suas ligações, ver db.get_db_connection)
+SQLITE_THREADS = int(os.environ.get('ASGI_SQLITE_THREADS', '4'))
+# Threads para os pedidos encaminhados para a app Flask
+WSGI_THREADS = int(os.environ.get('ASGI_WSGI_THREADS', '32'))
+# Tamanho máximo do corpo aceite nas rotas nativas
+MAX_BODY_BYTES = 64 * 1024
+
+sqlite_pool = ThreadPoolExecutor(max_workers=SQLITE_THREADS, thread_name_prefix='asgi-sqlite')
+wsgi_pool = ThreadPoolExecutor(max_workers=WSGI_THREADS, thread_name_prefix='asgi-wsgi')
+
+flask_app = wsgi.app
+win_counter = wsgi.win_counter
+session_interface = flask_app.session_interface
+session_serializer = session_interface.get_signing_serializer(flask_app)
+
+
+async def run_sqlite(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(sqlite_pool, fn, *args)
+
+
+# --- Redis (asyncio) ---
+
+class AsyncRedis:
+    """Cliente redis.asyncio criado no primeiro uso, que partilha o disjuntor do ResilientRedis."""
+
+    def __init__(self, breaker):
+        self.breaker = breaker
+        self._client = None
+        self._loop = None
+
+    def __bool__(self):
+        return self.breaker is not None
+
+    @property
+    def client(self):
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            import redis.asyncio
+            from redis.asyncio.retry import Retry
+            from redis.backoff import NoBackoff
+            self._client = redis.asyncio.from_url(
+                self.breaker.url, decode_responses=True,
+                socket_connect_timeout=self.breaker.connect_timeout,
+                socket_timeout=self.breaker.socket_timeout,
+                max_connections=self.breaker.max_connections,
+                retry=Retry(NoBackoff(), 0))
+            self._loop = loop
+        return self._client
+
+    async def get(self, key):
+        try:
+            value = await self.client.get(key)
+        except CONNECTION_ERRORS as e:
+            self.breaker.record_failure(e)
+            raise
+        self.breaker.record_success()
+        return value
+
+
+async_redis = AsyncRedis(wsgi.redis_client)
+
+
+async def read_count(day):
+    """Contagem do dia no backend (Redis assíncrono, ou SQLite no pool de threads)."""
+    if async_redis:
+        if async_redis.breaker.available:
+            try:
+                with BACKEND_DURATION.time(backend='redis', operation='read'):
+                    value = await async_redis.get(redis_count_key(day))
+                return int(value) if value else 0
+            except Exception as e:
+                print(f"ERRO get_today_correct_count (redis): {e}")
+                ERRORS.inc(source='redis_read')
+        REDIS_FALLBACKS.inc(operation='read')
+    return await run_sqlite(win_counter.read_sqlite, day)
+
+
+async def get_today_correct_count():
+    """Igual a app.get_today_correct_count, sem bloquear o event loop."""
+    day = datetime.utcnow().date().isoformat()
+    value = win_counter.cached(day)
+    if value is None:
+        read_at = time.monotonic()
+        value = win_counter.remember(day, await read_count(day), read_at)
+    return value
+
+
+async def register_win(catalog, session, solution_idx, guess_indices):
+    """Igual a app.register_win: conta a vitória uma única vez por dia."""
+    today = day_number()
+    if session.get('won') != today:
+        guesses = game_state.guesses_to_solve(session, catalog, guess_indices, solution_idx)
+        win_counter.record(catalog.names[solution_idx], guesses=guesses)
+        session['won'] = today
+    return await get_today_correct_count()
+
+
+# --- Pedido, sessão e respostas ---
+
+class Request:
+    def __init__(self, scope, body):
+        self.scope = scope
+        self.method = scope['method']
+        self.path = scope['path']
+        self.body = body
+        self.headers = {}
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin-1').lower()
+            value = value.decode('latin-1')
+            self.headers[name] = f"{self.headers[name]},{value}" if name in self.headers else value
+        self.args = {k: v[0] for k, v in parse_qs(scope.get('query_string', b'').decode('latin-1')).items()}
+
+    def json(self):
+        """Como request.get_json() do Flask: 415 sem Content-Type JSON, 400 se não for JSON válido."""
+        mimetype = self.headers.get('content-type', '').split(';', 1)[0].strip().lower()
+        if not (mimetype == 'application/json'
+                or (mimetype.startswith('application/') and mimetype.endswith('+json'))):
+            raise UnsupportedMediaType("Did not attempt to load JSON data because the request"
+                                       " Content-Type was not 'application/json'.")
+        try:
+            return flask_app.json.loads(self.body)
+        except ValueError:
+            raise BadRequest()
+
+
+def open_session(request):
+    """Lê o cookie de sessão do Flask (igual a SecureCookieSessionInterface.open_session)."""
+    with STAGE_DURATION.time(stage='session_open'):
+        value = parse_cookie(request.headers.get('cookie', '')).get(flask_app.config['SESSION_COOKIE_NAME'])
+        if not value:
+            return SecureCookieSession()
+        max_age = int(flask_app.permanent_session_lifetime.total_seconds())
+        try:
+            return SecureCookieSession(session_serializer.loads(value, max_age=max_age))
+        except BadSignature:
+            return SecureCookieSession()
+
+
+def session_headers(request, session):
+    """Cabeçalhos Set-Cookie/Vary equivalentes a SecureCookieSessionInterface.save_session."""
+    headers = []
+    name = flask_app.config['SESSION_COOKIE_NAME']
+    domain = session_interface.get_cookie_domain(flask_app)
+    path = session_interface.get_cookie_path(flask_app)
+    secure = session_interface.get_cookie_secure(flask_app)
+    samesite = session_interface.get_cookie_samesite(flask_app)
+    httponly = session_interface.get_cookie_httponly(flask_app)
+    partitioned = session_interface.get_cookie_partitioned(flask_app)
+    if session.accessed:
+        headers.append(('Vary', 'Cookie'))
+    if not session:
+        if session.modified:
+            headers.append(('Set-Cookie', dump_cookie(name, '', expires=0, max_age=0, domain=domain, path=path,
+                                                      secure=secure, httponly=httponly, samesite=samesite,
+                                                      partitioned=partitioned)))
+            if not session.accessed:
+                headers.append(('Vary', 'Cookie'))
+        return headers
+    if not session_interface.should_set_cookie(flask_app, session):
+        return headers
+    with STAGE_DURATION.time(stage='session_save'):
+        value = session_serializer.dumps(dict(session))
+        cookie = dump_cookie(name, value, expires=session_interface.get_expiration_time(flask_app, session),
+                             domain=domain, path=path, secure=secure, httponly=httponly, samesite=samesite,
+                             partitioned=partitioned)
+    SESSION_COOKIE_BYTES.observe(len(f"{name}={value}"))
+    headers.append(('Set-Cookie', cookie))
+    return headers
+
+
+def cors_headers(request):
+    # Equivalente ao CORS(app, supports_credentials=True) da app Flask
+    origin = request.headers.get('origin')
+    if not origin:
+        return []
+    return [('Access-Control-Allow-Origin', origin), ('Access-Control-Allow-Credentials', 'true'),
+            ('Vary', 'Origin')]
+
+
+def json_response(obj, status=200):
+    with STAGE_DURATION.time(stage='json_encode'):
+        # Mesma formatação que jsonify (compacta fora do modo debug)
+        provider = flask_app.json
+        pretty = provider.compact or (provider.compact is None and flask_app.debug)
+        dump_args = {'indent': 2} if pretty else {'separators': (',', ':')}
+        body = f"{provider.dumps(obj, **dump_args)}\n".encode('utf-8')
+    return status, [('Content-Type', 'application/json')], body
+
+
+def text_response(text, status):
+    return status, [('Content-Type', 'text/html; charset=utf-8')], text.encode('utf-8')
+
+
+def error_response(exc):
+    """A mesma página de erro que o Flask/Werkzeug devolve para `exc`."""
+    return exc.code, exc.get_headers(), exc.get_body().encode('utf-8')
+
+
+# --- Rotas nativas ---
+
+async def start_game(request, session):
+    """Mesmo contrato que app.start_game."""
+    try:
+        catalog = await run_sqlite(get_catalog)
+        if not catalog:
+            return json_response({'error': 'A base de dados está vazia.'}, 500)
+
+        today = day_number()
+        if session.get('day') != today:
+            game_state.reset_state(session, catalog, today)
+
+        solution_idx = game_state.solution_index(session, catalog)
+        previous_guesses = [
+            game_state.guess_entry(catalog, i, solution_idx)
+            for i in game_state.load_guesses(session, catalog)
+        ]
+        return json_response({
+            'catalogVersion': catalog.version,
+            'previousGuesses': previous_guesses,
+            'hasWon': session.get('won') == today,
+            'todayCorrectCount': await get_today_correct_count(),
+        })
+    except Exception:
+        traceback.print_exc()
+        return json_response({'error': 'Erro no servidor ao iniciar jogo.'}, 500)
+
+
+async def handle_guess(request, session):
+    """Mesmo contrato que app.handle_guess."""
+    catalog = await run_sqlite(get_catalog)
+    if session.get('day') is None or not catalog:
+        return json_response({'error': 'Jogo não iniciado.'}, 400)
+
+    data = request.json()
+    guess_name = data.get('guess', '').strip()
+    solution_idx = game_state.solution_index(session, catalog)
+
+    guess_idx = catalog.resolve_name(guess_name)
+    if guess_idx is None:
+        return json_response({'error': 'Personagem não encontrado.'}, 404)
+
+    is_correct = guess_idx == solution_idx
+    with STAGE_DURATION.time(stage='guess_eval'):
+        results = catalog.feedback.results(guess_idx, solution_idx)
+    today_count = await register_win(catalog, session, solution_idx, [guess_idx]) if is_correct else None
+
+    response = {'guess': catalog.names[guess_idx], 'results': results, 'isCorrect': is_correct}
+    if today_count is not None:
+        response['todayCorrectCount'] = today_count
+    try:
+        game_state.add_guess(session, catalog, guess_idx)
+    except Exception as e:
+        print(f"Warning: could not persist guess in session: {e}")
+    return json_response(response)
+
+
+def _migrate_counts(direction):
+    redis_client = wsgi.redis_client
+    if direction == 'to-sqlite':
+        counts_migration.redis_to_sqlite(redis_client, get_db_connection(wsgi.DATABASE_FILE), progress=None)
+    else:
+        counts_migration.sqlite_to_redis(get_db_connection(wsgi.DATABASE_FILE, readonly=True), redis_client,
+                                         progress=None)
+
+
+async def migrate_counts(request, session):
+    """Mesmo contrato que app.migrate_counts (corre no pool de threads do SQLite)."""
+    if not wsgi.authorization_matches(request.headers.get('authorization', ''), 'MIGRATE_TOKEN'):
+        return text_response('Forbidden', 403)
+    if not wsgi.redis_client:
+        return text_response('Redis not configured', 400)
+    try:
+        await run_sqlite(_migrate_counts, request.args.get('direction'))
+        return text_response('OK', 200)
+    except Exception as e:
+        print(f"Migration error: {e}")
+        return text_response('Internal Error', 500)
+
+
+# (método, caminho) -> (endpoint, view, usa a sessão)
+ROUTES = {
+    ('POST', '/api/start_game'): ('start_game', start_game, True),
+    ('POST', '/api/guess'): ('handle_guess', handle_guess, True),
+    ('POST', '/admin/migrate_counts'): ('migrate_counts', migrate_counts, False),
+}
+
+
+# --- Aplicação ASGI ---
+
+async def read_body(receive):
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            return None
+        chunks.append(chunk)
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+async def wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def send_response(send, status, headers, body):
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def handle_native(scope, receive, send, endpoint, view, uses_session):
+    started = time.perf_counter()
+    status = 500
+    try:
+        body = await read_body(receive)
+        if body is None:
+            status, headers, content = error_response(RequestEntityTooLarge())
+        else:
+            request = Request(scope, body)
+            session = open_session(request)
+            # Como no Flask, usar a sessão num pedido acrescenta `Vary: Cookie`
+            session.accessed = uses_session
+            try:
+                status, headers, content = await view(request, session)
+            except HTTPException as e:
+                status, headers, content = error_response(e)
+            except Exception:
+                traceback.print_exc()
+                ERRORS.inc(source='asgi')
+                status, headers, content = error_response(InternalServerError())
+            # Também nas respostas de erro, como o Flask (process_response corre sempre);
+            # o CORS é um after_request, por isso vem antes dos cabeçalhos da sessão
+            headers = headers + cors_headers(request) + session_headers(request, session)
+        headers.append(('Content-Length', str(len(content))))
+        await send_response(send, status, headers, content)
+    finally:
+        REQUEST_DURATION.observe(time.perf_counter() - started, endpoint=endpoint,
+                                 method=scope['method'], status=str(status))
+
+
+def wsgi_environ(scope, body):
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': str(client[0]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            key = name
+        else:
+            key = f'HTTP_{name}'
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+async def handle_wsgi(scope, receive, send):
+    """Encaminha o pedido para a app Flask numa thread do pool (as respostas em stream continuam em stream).
+
+    A chamada à app, a iteração da resposta e o close() correm todos na mesma
+    thread: os contextos abertos pelo stream_with_context são fechados na
+    thread que os abriu, e a thread só fica ocupada enquanto há resposta.
+    """
+    loop = asyncio.get_running_loop()
+    body = await read_body(receive)
+    if body is None:
+        status, headers, content = error_response(RequestEntityTooLarge())
+        return await send_response(send, status, headers + [('Content-Length', str(len(content)))], content)
+
+    environ = wsgi_environ(scope, body)
+    queue = asyncio.Queue()
+    stop = threading.Event()
+
+    def put(item):
+        loop.call_soon_threadsafe(queue.put_nowait, item)
+
+    def run():
+        def start_response(status, headers, exc_info=None):
+            put(('start', int(status.split(' ', 1)[0]), headers))
+            return lambda data: None
+
+        try:
+            result = flask_app(environ, start_response)
+            try:
+                for chunk in result:
+                    if stop.is_set():
+                        break
+                    if chunk:
+                        put(('body', chunk))
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+        except Exception:
+            traceback.print_exc()
+            ERRORS.inc(source='asgi')
+        finally:
+            put(('end',))
+
+    loop.run_in_executor(wsgi_pool, run)
+    watcher = asyncio.ensure_future(wait_disconnect(receive))
+    watcher.add_done_callback(lambda _: stop.set())
+    started = False
+    try:
+        while True:
+            item = await queue.get()
+            if item[0] == 'start':
+                started = True
+                await send({'type': 'http.response.start', 'status': item[1],
+                            'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in item[2]]})
+            elif item[0] == 'body':
+                if not stop.is_set():
+                    await send({'type': 'http.response.body', 'body': item[1], 'more_body': True})
+            else:
+                break
+        if started:
+            await send({'type': 'http.response.body', 'body': b''})
+        else:
+            status, headers, content = error_response(InternalServerError())
+            await send_response(send, status, headers + [('Content-Length', str(len(content)))], content)
+    finally:
+        # Se o envio falhar (cliente desligado), a thread pára no próximo bloco
+        stop.set()
+        watcher.cancel()
+
+
+# --- Contagem em direto (SSE) ---
+
+async def stream_today(scope, receive, send):
+    """Mesmo stream que app.stream_today, sem ocupar uma thread por cliente.
+
+    O live.TodayBroadcaster da app Flask (a mesma thread de leitura/pub-sub)
+    acorda cada cliente através do event loop.
+    """
+    loop = asyncio.get_running_loop()
+    request = Request(scope, b'')
+    broadcaster = wsgi.today_broadcaster
+    changed = asyncio.Event()
+
+    def notify():
+        loop.call_soon_threadsafe(changed.set)
+
+    if not broadcaster.listen(notify):
+        status, headers, content = json_response({'error': 'Demasiadas ligações em direto.'}, 503)
+        headers = headers + cors_headers(request) + [('Content-Length', str(len(content)))]
+        REQUEST_DURATION.observe(0.0, endpoint='stream_today', method='GET', status='503')
+        return await send_response(send, status, headers, content)
+
+    opened = time.perf_counter()
+    disconnected = asyncio.ensure_future(wait_disconnect(receive))
+    try:
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in [
+                ('Cache-Control', 'no-cache'),
+                ('X-Accel-Buffering', 'no'),
+                ('Content-Type', 'text/event-stream; charset=utf-8'),
+            ] + cors_headers(request)]})
+        # Como na app Flask, o tempo do pedido vai até ao início do stream
+        REQUEST_DURATION.observe(time.perf_counter() - opened, endpoint='stream_today', method='GET', status='200')
+
+        async def emit(text):
+            await send({'type': 'http.response.body', 'body': text.encode('utf-8'), 'more_body': True})
+
+        started = time.monotonic()
+        await emit(live.RETRY_EVENT)
+        if broadcaster.snapshot()[1] is None:
+            await run_sqlite(lambda: broadcaster.publish(broadcaster.read_value()))
+        seen = -1
+        while time.monotonic() - started < live.MAX_STREAM_SECONDS and not disconnected.done():
+            # Limpar antes de ler: um valor publicado depois da leitura volta a acordar o cliente
+            changed.clear()
+            version, value = broadcaster.snapshot()
+            if version == seen:
+                waiter = asyncio.ensure_future(changed.wait())
+                await asyncio.wait({waiter, disconnected}, timeout=live.HEARTBEAT_INTERVAL,
+                                   return_when=asyncio.FIRST_COMPLETED)
+                waiter.cancel()
+                if disconnected.done():
+                    break
+                version, value = broadcaster.snapshot()
+            if version != seen and value is not None:
+                seen = version
+                await emit(live.count_event(value))
+            else:
+                await emit(live.KEEP_ALIVE_EVENT)
+        if not disconnected.done():
+            await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        disconnected.cancel()
+        broadcaster.unlisten(notify)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await asyncio.get_running_loop().run_in_executor(sqlite_pool, win_counter.flush)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+    if scope['method'] == 'GET' and scope['path'] == '/api/stream/today':
+        return await stream_today(scope, receive, send)
+    route = ROUTES.get((scope['method'], scope['path']))
+    if route is None:
+        return await handle_wsgi(scope, receive, send)
+    return await handle_native(scope, receive, send, *route)
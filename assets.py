@@ -0,0 +1,149 @@
+"""Ficheiros estáticos com nome por conteúdo, pré-comprimidos e em cache longa.
+
+Passo de build (antes do deploy):
+
+    python assets.py
+
+Para cada CSS/JS em static/ escreve em static/dist/ uma cópia com o hash do
+conteúdo no nome (ex.: style.3f2a9c1d0b7e.css) e as variantes .gz/.br, e um
+manifest.json {nome original: nome com hash}.
+
+Ao arrancar, o app.py lê o manifest e guarda tudo em memória: os ficheiros
+são servidos com `Cache-Control: immutable` (o nome muda quando o conteúdo
+muda) e o HTML é reescrito para apontar para os nomes com hash, servido com
+ETag e cache curta. Sem manifest, o HTML aponta para static/ como antes.
+"""
+import hashlib
+import json
+import mimetypes
+import os
+import sys
+
+from precompressed import encode_variants
+
+project_root = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(project_root, 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_NAME = 'manifest.json'
+# Prefixo dos URLs dos ficheiros estáticos (rota static do Flask)
+STATIC_URL = '/static/'
+DIST_URL = STATIC_URL + 'dist/'
+# Extensões processadas pelo build
+ASSET_EXTENSIONS = ('.css', '.js')
+# Sufixo em disco de cada codificação pré-comprimida
+ENCODING_SUFFIXES = {'gzip': '.gz', 'br': '.br'}
+HASH_LENGTH = 12
+
+
+def fingerprint(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def build(source_dir=STATIC_DIR, output_dir=DIST_DIR):
+    """Gera os ficheiros com hash, as variantes comprimidas e o manifest. Devolve o manifest."""
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = {}
+    for name in sorted(os.listdir(source_dir)):
+        stem, ext = os.path.splitext(name)
+        if ext not in ASSET_EXTENSIONS:
+            continue
+        with open(os.path.join(source_dir, name), 'rb') as f:
+            data = f.read()
+        hashed = f"{stem}.{fingerprint(data)}{ext}"
+        for encoding, content in encode_variants(data).items():
+            _write_atomic(os.path.join(output_dir, hashed + ENCODING_SUFFIXES.get(encoding, '')), content)
+        manifest[name] = hashed
+
+    # Remove versões antigas que já não constam do manifest
+    current = set(manifest.values())
+    for name in os.listdir(output_dir):
+        base = name
+        for suffix in ENCODING_SUFFIXES.values():
+            if base.endswith(suffix):
+                base = base[:-len(suffix)]
+        if name != MANIFEST_NAME and base not in current:
+            os.remove(os.path.join(output_dir, name))
+
+    _write_atomic(os.path.join(output_dir, MANIFEST_NAME),
+                  json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
+
+
+def _write_atomic(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class StaticAsset:
+    """Um ficheiro servido a partir da memória, com as variantes por codificação."""
+
+    def __init__(self, variants, mimetype, etag):
+        self.variants = variants
+        self.mimetype = mimetype
+        self.etag = etag
+
+
+class AssetManifest:
+    """Manifest e ficheiros do build, carregados uma vez ao arrancar."""
+
+    def __init__(self, output_dir=DIST_DIR):
+        self.files = {}
+        self.urls = {}
+        path = os.path.join(output_dir, MANIFEST_NAME)
+        if not os.path.exists(path):
+            return
+        with open(path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        for original, hashed in manifest.items():
+            variants = {}
+            for encoding, suffix in (('identity', ''),) + tuple(ENCODING_SUFFIXES.items()):
+                variant_path = os.path.join(output_dir, hashed + suffix)
+                if os.path.exists(variant_path):
+                    with open(variant_path, 'rb') as f:
+                        variants[encoding] = f.read()
+            if 'identity' not in variants:
+                print(f"WARN: ficheiro do build em falta: {hashed} (corra python assets.py)")
+                continue
+            mimetype = mimetypes.guess_type(hashed)[0] or 'application/octet-stream'
+            # O nome já identifica o conteúdo; o hash serve também de ETag
+            self.files[hashed] = StaticAsset(variants, mimetype, hashed.rsplit('.', 2)[-2])
+            self.urls[STATIC_URL + original] = DIST_URL + hashed
+
+    def __bool__(self):
+        return bool(self.files)
+
+    def rewrite(self, html):
+        """Substitui no HTML os URLs de static/ pelos nomes com hash."""
+        for original, hashed in self.urls.items():
+            html = html.replace(f'"{original}"', f'"{hashed}"')
+        return html
+
+
+def load_page(path, manifest):
+    """Lê uma página HTML, reescreve os URLs dos ficheiros estáticos e pré-comprime-a."""
+    with open(path, encoding='utf-8') as f:
+        html = manifest.rewrite(f.read())
+    data = html.encode('utf-8')
+    return StaticAsset(encode_variants(data), 'text/html', fingerprint(data))
+
+
+def load_optional(path, mimetype):
+    """Ficheiro opcional (ex.: favicon) lido uma única vez; None se não existir."""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        data = f.read()
+    return StaticAsset({'identity': data}, mimetype, fingerprint(data))
+
+
+def main():
+    manifest = build()
+    for original, hashed in sorted(manifest.items()):
+        print(f"{original} -> {os.path.relpath(os.path.join(DIST_DIR, hashed), project_root)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,10 @@
+"""Benchmarks offline do Eternaldle.
+
+    python -m benchmarks micro
+    python -m benchmarks client --users 50 --output run.json
+    python -m benchmarks gunicorn --workers 4 --output run.json
+    python -m benchmarks compare old.json new.json
+
+Tudo corre localmente: uma base de dados SQLite descartável e, se o pacote
+`fakeredis` estiver instalado, um Redis em memória a ouvir numa porta local.
+"""
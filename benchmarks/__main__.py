@@ -0,0 +1,129 @@
+"""CLI dos benchmarks: `python -m benchmarks {micro,client,gunicorn,all,compare}`."""
+import argparse
+import json
+import os
+import platform
+import sys
+from datetime import datetime
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from .fixtures import prepare_environment  # noqa: E402
+from .stats import format_table  # noqa: E402
+
+
+def _names_and_solution(database_file):
+    from catalog import day_number, load_catalog
+    catalog = load_catalog(database_file)
+    return list(catalog.names), catalog.solution_for(day_number())['NOME']
+
+
+def run_micro(env, args):
+    from . import micro
+    return micro.run(env['database'], repeat=args.repeat)
+
+
+def run_client(env, args):
+    import app
+    import catalog
+    import db
+    from . import load
+    # Nunca escrever vitórias de teste na base de dados real
+    assert db.DATABASE_FILE == env['database'], db.DATABASE_FILE
+    names, solution = _names_and_solution(env['database'])
+    make_client = lambda: load.FlaskClient(app.app)  # noqa: E731
+
+    rows = load.run_sessions(make_client, names, solution, args.users, args.guesses,
+                             args.concurrency).summaries('client/')
+
+    def rollover():
+        # Simula a primeira vaga após a mudança de dia: catálogo frio no worker
+        catalog._catalog = None
+    rows += load.run_stampede(make_client, names, solution, args.users,
+                              before=rollover).summaries('client/stampede/')
+    app.win_counter.flush()
+    return rows
+
+
+def run_gunicorn(env, args):
+    from . import load
+    names, solution = _names_and_solution(env['database'])
+    rows = []
+    with load.GunicornServer(workers=args.workers, worker_class=args.worker_class,
+                             threads=args.threads) as server:
+        prefix = f'gunicorn[{args.workers}w]/'
+        rows += load.run_sessions(server.client, names, solution, args.users, args.guesses,
+                                  args.concurrency).summaries(prefix)
+        rows += load.run_stampede(server.client, names, solution,
+                                  args.users).summaries(prefix + 'stampede/')
+    return rows
+
+
+def compare(old_path, new_path):
+    """Mostra a variação de p50/p95/p99 e débito entre duas execuções guardadas."""
+    with open(old_path) as f:
+        old = {r['name']: r for r in json.load(f)['results']}
+    with open(new_path) as f:
+        new = {r['name']: r for r in json.load(f)['results']}
+    print(f"{'benchmark':<44} {'p50':>16} {'p95':>16} {'p99':>16} {'rps':>16}")
+    for name in sorted(set(old) & set(new)):
+        cells = []
+        for key in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps'):
+            a, b = old[name][key], new[name][key]
+            delta = f"{(b - a) / a * 100:+.1f}%" if a else 'n/a'
+            cells.append(f"{b:>8} {delta:>7}")
+        print(f"{name:<44} " + ' '.join(cells))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__)
+    parser.add_argument('mode', choices=['micro', 'client', 'gunicorn', 'all', 'compare'])
+    parser.add_argument('files', nargs='*', help='compare: resultado antigo e novo (JSON)')
+    parser.add_argument('--users', type=int, default=50, help='sessões simuladas')
+    parser.add_argument('--guesses', type=int, default=6, help='palpites por sessão')
+    parser.add_argument('--concurrency', type=int, default=8, help='utilizadores em simultâneo')
+    parser.add_argument('--workers', type=int, default=4, help='workers do gunicorn')
+    parser.add_argument('--worker-class', default='sync', help='classe de worker do gunicorn')
+    parser.add_argument('--threads', type=int, default=1, help='threads por worker do gunicorn')
+    parser.add_argument('--repeat', type=int, default=20, help='repetições dos micro-benchmarks')
+    parser.add_argument('--no-redis', action='store_true', help='correr só com SQLite')
+    parser.add_argument('--output', help='ficheiro JSON onde guardar os resultados')
+    args = parser.parse_args(argv)
+
+    if args.mode == 'compare':
+        if len(args.files) != 2:
+            parser.error('compare precisa de dois ficheiros JSON')
+        compare(*args.files)
+        return 0
+
+    env = prepare_environment(use_redis=not args.no_redis)
+    rows = []
+    if args.mode in ('micro', 'all'):
+        rows += run_micro(env, args)
+    if args.mode in ('client', 'all'):
+        rows += run_client(env, args)
+    if args.mode in ('gunicorn', 'all'):
+        rows += run_gunicorn(env, args)
+
+    print(format_table(rows))
+    if args.output:
+        report = {
+            'meta': {
+                'timestamp': datetime.utcnow().isoformat() + 'Z',
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'redis': bool(env['redis_url']),
+                'args': {k: v for k, v in vars(args).items() if k != 'files'},
+            },
+            'results': rows,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Resultados guardados em {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""Ambiente descartável: base de dados SQLite temporária e Redis local em memória."""
+import os
+import socket
+import tempfile
+import threading
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def make_database(directory=None):
+    """Cria uma base de dados nova (via setup_database) e devolve o caminho.
+
+    O ETERNALDLE_DB é definido antes de importar qualquer módulo do projeto:
+    o db.py (e com ele o app.py e o catalog.py) lê o caminho ao ser importado.
+    """
+    directory = directory or tempfile.mkdtemp(prefix='eternaldle-bench-')
+    path = os.path.join(directory, 'eternaldle.db')
+    os.environ['ETERNALDLE_DB'] = path
+    import setup_database
+    if setup_database.DATABASE_FILE != path:
+        raise RuntimeError(f"setup_database já importado com outra base de dados: {setup_database.DATABASE_FILE}")
+    setup_database.create_and_populate_db()
+    return path
+
+
+def start_redis():
+    """Arranca um servidor Redis em memória (fakeredis) numa porta local.
+
+    Devolve (url, servidor) ou (None, None) se o fakeredis não estiver instalado.
+    """
+    try:
+        from fakeredis import TcpFakeServer
+    except ImportError:
+        print("WARN: fakeredis não instalado; benchmarks correm sem Redis.")
+        return None, None
+    port = free_port()
+    server = TcpFakeServer(('127.0.0.1', port), server_type='redis')
+    # Ligações abertas não podem impedir o processo de terminar
+    server.daemon_threads = True
+    server.block_on_close = False
+    threading.Thread(target=server.serve_forever, name='fake-redis', daemon=True).start()
+    return f"redis://127.0.0.1:{port}/0", server
+
+
+def prepare_environment(use_redis=True):
+    """Configura as variáveis de ambiente lidas pelo app.py. Chamar antes de `import app`."""
+    path = make_database()
+    redis_url, server = start_redis() if use_redis else (None, None)
+    if redis_url:
+        os.environ['REDIS_URL'] = redis_url
+    else:
+        os.environ.pop('REDIS_URL', None)
+        os.environ.pop('UPSTASH_REDIS_URL', None)
+    return {'database': path, 'redis_url': redis_url, 'redis_server': server}
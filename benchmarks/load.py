@@ -0,0 +1,160 @@
+"""Cenários de carga sobre a API, via Flask test client ou via HTTP (gunicorn)."""
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .fixtures import free_port
+from .stats import Recorder
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FlaskClient:
+    """Um utilizador virtual sobre `app.test_client()` (cookie jar próprio)."""
+
+    def __init__(self, flask_app):
+        self.client = flask_app.test_client()
+
+    def request(self, method, path, payload=None, headers=None):
+        response = self.client.open(path, method=method, json=payload, headers=headers or {})
+        body = response.get_data()
+        return response.status_code, body
+
+
+class HttpClient:
+    """Um utilizador virtual sobre HTTP/1.1 keep-alive, com o cookie de sessão."""
+
+    def __init__(self, host, port):
+        self.conn = http.client.HTTPConnection(host, port, timeout=30)
+        self.cookie = None
+
+    def request(self, method, path, payload=None, headers=None):
+        headers = dict(headers or {})
+        body = None
+        if payload is not None:
+            body = json.dumps(payload)
+            headers['Content-Type'] = 'application/json'
+        if self.cookie:
+            headers['Cookie'] = self.cookie
+        self.conn.request(method, path, body=body, headers=headers)
+        response = self.conn.getresponse()
+        data = response.read()
+        set_cookie = response.getheader('Set-Cookie')
+        if set_cookie:
+            self.cookie = set_cookie.split(';', 1)[0]
+        return response.status, data
+
+    def close(self):
+        self.conn.close()
+
+
+def _call(client, recorder, name, method, path, payload=None, headers=None):
+    t = time.perf_counter()
+    try:
+        status, body = client.request(method, path, payload, headers)
+    except Exception:
+        recorder.record(name, time.perf_counter() - t, ok=False)
+        return None, None
+    recorder.record(name, time.perf_counter() - t, ok=status < 400)
+    return status, body
+
+
+def play_session(client, recorder, names, solution, guesses):
+    """Um visitante típico: start_game, lista de nomes, N palpites e restauro em lote."""
+    _, body = _call(client, recorder, 'start_game', 'POST', '/api/start_game')
+    version = json.loads(body).get('catalogVersion', '') if body else ''
+    _call(client, recorder, 'characters', 'GET', f'/api/characters?v={version}',
+          headers={'Accept-Encoding': 'gzip'})
+    picks = random.sample(names, min(guesses, len(names)))
+    if solution not in picks:
+        picks[-1] = solution
+    for name in picks:
+        _call(client, recorder, 'guess', 'POST', '/api/guess', {'guess': name})
+    _call(client, recorder, 'guesses_batch', 'POST', '/api/guesses:batch', {'guesses': picks})
+
+
+def run_sessions(make_client, names, solution, users, guesses, concurrency):
+    recorder = Recorder()
+
+    def user(_):
+        client = make_client()
+        try:
+            play_session(client, recorder, names, solution, guesses)
+        finally:
+            getattr(client, 'close', lambda: None)()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(user, range(users)))
+    recorder.stop()
+    return recorder
+
+
+def run_stampede(make_client, names, solution, users, before=None):
+    """Virada do dia: `users` sessões novas chamam start_game no mesmo instante e depois chutam."""
+    recorder = Recorder()
+    barrier = threading.Barrier(users)
+    clients = [make_client() for _ in range(users)]
+    if before:
+        before()
+
+    def user(client):
+        barrier.wait()
+        _call(client, recorder, 'start_game', 'POST', '/api/start_game')
+        _call(client, recorder, 'guess', 'POST', '/api/guess', {'guess': random.choice(names)})
+        _call(client, recorder, 'guess', 'POST', '/api/guess', {'guess': solution})
+
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        list(pool.map(user, clients))
+    recorder.stop()
+    for client in clients:
+        getattr(client, 'close', lambda: None)()
+    return recorder
+
+
+class GunicornServer:
+    """Arranca `gunicorn app:app` localmente com o ambiente atual (ETERNALDLE_DB, REDIS_URL)."""
+
+    def __init__(self, workers=4, worker_class='sync', threads=1):
+        self.port = free_port()
+        self.workers = workers
+        self.worker_class = worker_class
+        self.threads = threads
+        self.process = None
+
+    def __enter__(self):
+        cmd = [sys.executable, '-m', 'gunicorn', 'app:app',
+               '--bind', f'127.0.0.1:{self.port}',
+               '--workers', str(self.workers),
+               '--worker-class', self.worker_class,
+               '--threads', str(self.threads),
+               '--log-level', 'warning']
+        self.process = subprocess.Popen(cmd, cwd=project_root, env=os.environ.copy())
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                client = HttpClient('127.0.0.1', self.port)
+                status, _ = client.request('GET', '/api/characters')
+                client.close()
+                if status == 200:
+                    return self
+            except OSError:
+                time.sleep(0.1)
+        self.__exit__()
+        raise RuntimeError('gunicorn não arrancou a tempo')
+
+    def __exit__(self, *exc):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+    def client(self):
+        return HttpClient('127.0.0.1', self.port)
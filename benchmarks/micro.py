@@ -0,0 +1,39 @@
+"""Micro-benchmarks: comparação de atributos e carregamento do catálogo."""
+import time
+
+from catalog import load_catalog
+from feedback import FeedbackMatrix, compare_characters
+from .stats import summarize
+
+
+def _timed(name, func, repeat):
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        t = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - t)
+    return summarize(name, latencies, time.perf_counter() - started)
+
+
+def run(database_file, repeat=20):
+    catalog = load_catalog(database_file)
+    records = [dict(r) for r in catalog.records]
+    n = len(records)
+    pairs = [(g, s) for g in range(n) for s in range(n)]
+
+    def compare_loop():
+        for g, s in pairs:
+            compare_characters(records[g], records[s])
+
+    def matrix_lookup():
+        results = catalog.feedback.results
+        for g, s in pairs:
+            results(g, s)
+
+    return [
+        _timed(f'micro/compare_loop_{n}x{n}', compare_loop, repeat),
+        _timed(f'micro/matrix_lookup_{n}x{n}', matrix_lookup, repeat),
+        _timed('micro/feedback_matrix_build', lambda: FeedbackMatrix(catalog.records), repeat),
+        _timed('micro/catalog_load', lambda: load_catalog(database_file), repeat),
+    ]
@@ -0,0 +1,61 @@
+"""Cronómetros e resumo de latências (débito e percentis)."""
+import time
+from collections import defaultdict
+
+
+def percentile(sorted_values, p):
+    """Percentil `p` (0-100) por interpolação linear de uma lista já ordenada."""
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(name, latencies, elapsed, errors=0):
+    """Resumo JSON de uma série de latências (segundos) medidas em `elapsed` segundos."""
+    values = sorted(latencies)
+    return {
+        'name': name,
+        'requests': len(values),
+        'errors': errors,
+        'throughput_rps': round(len(values) / elapsed, 1) if elapsed > 0 else 0.0,
+        'mean_ms': round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        'p50_ms': round(percentile(values, 50) * 1000, 3),
+        'p95_ms': round(percentile(values, 95) * 1000, 3),
+        'p99_ms': round(percentile(values, 99) * 1000, 3),
+    }
+
+
+class Recorder:
+    """Junta latências por endpoint (thread-safe o suficiente: list.append é atómico)."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def record(self, name, seconds, ok=True):
+        self.latencies[name].append(seconds)
+        if not ok:
+            self.errors[name] += 1
+
+    def stop(self):
+        self.finished = time.perf_counter()
+
+    def summaries(self, prefix=''):
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        return [summarize(prefix + name, values, elapsed, self.errors[name])
+                for name, values in sorted(self.latencies.items())]
+
+
+def format_table(rows):
+    """Tabela de texto simples para o terminal."""
+    header = f"{'benchmark':<44} {'n':>7} {'rps':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'err':>5}"
+    lines = [header, '-' * len(header)]
+    for r in rows:
+        lines.append(f"{r['name']:<44} {r['requests']:>7} {r['throughput_rps']:>10} "
+                     f"{r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9} {r['errors']:>5}")
+    return '\n'.join(lines)
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta
+from types import MappingProxyType
+
+from db import DATABASE_FILE, catalog_stamp_path, get_db_connection
+from feedback import FeedbackMatrix
+from metrics import BACKEND_DURATION, ERRORS, STAGE_DURATION
+from names import NameIndex
+from precompressed import encode_variants
+
+# Data de referência usada para escolher o personagem do dia
+EPOCH = date(2024, 1, 1)
+# Quantos dias do calendário ficam pré-calculados a partir do carregamento
+SCHEDULE_DAYS = 366
+# Intervalo mínimo (segundos) entre verificações do ficheiro da base de dados
+CHECK_INTERVAL = 1.0
+
+
+class Catalog:
+    """Instantâneo imutável da tabela `eternaldle`, partilhado por todo o processo."""
+
+    def __init__(self, rows, digest):
+        # Ordem da tabela (é a ordem devolvida em characterNames)
+        self.records = tuple(MappingProxyType(dict(row)) for row in rows)
+        self.names = tuple(r['NOME'] for r in self.records)
+        self.index = MappingProxyType({name: i for i, name in enumerate(self.names)})
+        # Ordem alfabética para garantir que o índice seja consistente em todos os clientes
+        self.sorted_records = tuple(sorted(self.records, key=lambda r: r['NOME']))
+        self.digest = digest
+        # Versão curta usada no ETag e no URL de /api/characters
+        self.version = digest[:16]
+        # Lista de nomes já serializada e comprimida (igual para todos os utilizadores)
+        payload = json.dumps({'characterNames': list(self.names), 'catalogVersion': self.version},
+                             ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self.characters_payload = encode_variants(payload)
+        # Todos os resultados palpite×solução, pré-calculados
+        self.feedback = FeedbackMatrix(self.records)
+        # Índice de prefixos para /api/suggest e resolução de nomes sem acentos/maiúsculas
+        self.name_index = NameIndex(self.names)
+
+        # Calendário data -> personagem, pré-calculado para o próximo ano
+        start = datetime.utcnow().date() - timedelta(days=1)
+        self.schedule = MappingProxyType({
+            (start + timedelta(days=i)).isoformat(): self._pick(start + timedelta(days=i))
+            for i in range(SCHEDULE_DAYS)
+        }) if self.records else MappingProxyType({})
+
+    def __len__(self):
+        return len(self.records)
+
+    def resolve_name(self, text):
+        """Índice do personagem `text`: nome exato ou igual depois de normalizado (None se não existe)."""
+        idx = self.index.get(text)
+        return idx if idx is not None else self.name_index.lookup(text)
+
+    def _pick(self, day):
+        days_since_epoch = (day - EPOCH).days
+        return self.sorted_records[days_since_epoch % len(self.sorted_records)]
+
+    def solution_for(self, day):
+        """Devolve o personagem do dia `day` (date, string ISO ou número do dia)."""
+        if isinstance(day, int):
+            day = EPOCH + timedelta(days=day)
+        elif isinstance(day, str):
+            cached = self.schedule.get(day)
+            if cached is not None:
+                return cached
+            day = date.fromisoformat(day)
+        cached = self.schedule.get(day.isoformat())
+        return cached if cached is not None else self._pick(day)
+
+
+def day_number(day=None):
+    """Número de dias desde EPOCH para `day` (por omissão, hoje em UTC)."""
+    if day is None:
+        day = datetime.utcnow().date()
+    return (day - EPOCH).days
+
+
+def _file_signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _catalog_signature(path):
+    """Identifica a versão do catálogo só com `stat`.
+
+    Com o ficheiro de versão do setup_database.py basta o inode da base de
+    dados (muda com o rename atómico) e o próprio ficheiro de versão; sem ele
+    usa-se a assinatura completa do ficheiro da base de dados.
+    """
+    stamp = _file_signature(catalog_stamp_path(path))
+    main = _file_signature(path)
+    if stamp is None:
+        return main
+    return (main[0] if main else None, stamp)
+
+
+def load_catalog(path=DATABASE_FILE):
+    """Lê a tabela `eternaldle` e devolve um novo Catalog (ou None se não existir)."""
+    if not os.path.exists(path):
+        return None
+    with BACKEND_DURATION.time(backend='sqlite', operation='catalog_read'):
+        conn = get_db_connection(path, readonly=True)
+        rows = [dict(row) for row in conn.execute("SELECT * FROM eternaldle")]
+    digest = hashlib.sha256(repr([sorted(r.items()) for r in rows]).encode('utf-8')).hexdigest()
+    return Catalog(rows, digest)
+
+
+_lock = threading.Lock()
+_catalog = None
+_signature = None
+_checked_at = 0.0
+
+
+def get_catalog():
+    """Devolve o catálogo do processo, recarregando-o se o ficheiro da base de dados mudou."""
+    global _catalog, _signature, _checked_at
+    now = time.monotonic()
+    if _catalog is not None and now - _checked_at < CHECK_INTERVAL:
+        return _catalog
+
+    with _lock:
+        if _catalog is not None and now - _checked_at < CHECK_INTERVAL:
+            return _catalog
+        signature = _catalog_signature(DATABASE_FILE)
+        if _catalog is None or signature != _signature:
+            try:
+                with STAGE_DURATION.time(stage='catalog_load'):
+                    fresh = load_catalog(DATABASE_FILE)
+            except sqlite3.Error as e:
+                print(f"ERRO ao carregar catálogo: {e}")
+                ERRORS.inc(source='catalog_load')
+                fresh = _catalog
+            # Só substitui o objeto se o conteúdo mudou (ex.: escrita em daily_stats não conta)
+            if fresh is None or _catalog is None or fresh.digest != _catalog.digest:
+                _catalog = fresh
+            _signature = signature
+        _checked_at = now
+        return _catalog
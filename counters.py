@@ -0,0 +1,356 @@
+"""Contador diário de acertos com escrita diferida (write-behind).
+
+Os incrementos são agregados em memória e enviados em lote para o Redis
+(INCRBY + SETNX + HINCRBY do histograma num único pipeline) ou, sem Redis,
+para o SQLite (um upsert em lote por tabela, na mesma transação). As
+leituras usam um valor em cache com desatualização limitada, somado aos
+incrementos ainda pendentes deste processo (incluindo o lote que está a
+ser enviado, até o novo total estar em cache).
+
+O histograma guarda, por dia, quantos vencedores precisaram de 1, 2, ...
+palpites (o último bucket, HISTOGRAM_BUCKETS, conta também os valores acima).
+"""
+import atexit
+import os
+import threading
+import time
+from datetime import datetime
+
+from db import HISTOGRAM_BUCKETS, HISTOGRAM_COLUMNS, get_db_connection
+from live import COUNT_CHANNEL
+from metrics import BACKEND_DURATION, ERRORS, REDIS_FALLBACKS
+
+# Envia os incrementos pendentes a cada FLUSH_INTERVAL segundos...
+FLUSH_INTERVAL = float(os.environ.get('COUNTER_FLUSH_INTERVAL', '1.0'))
+# ...ou assim que se acumularem FLUSH_THRESHOLD incrementos
+FLUSH_THRESHOLD = int(os.environ.get('COUNTER_FLUSH_THRESHOLD', '50'))
+# Idade máxima (segundos) do valor lido do backend antes de voltar a consultá-lo
+CACHE_TTL = float(os.environ.get('COUNTER_CACHE_TTL', '2.0'))
+# Idade máxima (segundos) do histograma do dia servido por /api/stats/today
+STATS_CACHE_TTL = float(os.environ.get('STATS_CACHE_TTL', '5.0'))
+
+
+def redis_count_key(day):
+    return f"eternaldle:daily:{day}:count"
+
+
+def redis_solution_key(day):
+    return f"eternaldle:daily:{day}:solution"
+
+
+def redis_histogram_key(day):
+    return f"eternaldle:daily:{day}:guesses"
+
+
+def histogram_bucket(guesses):
+    """Posição (0..HISTOGRAM_BUCKETS-1) de um número de palpites no histograma."""
+    return min(max(int(guesses), 1), HISTOGRAM_BUCKETS) - 1
+
+
+_HISTOGRAM_UPSERT = f'''
+    INSERT INTO daily_guess_histogram (date, {', '.join(HISTOGRAM_COLUMNS)})
+    VALUES (?, {', '.join('?' * len(HISTOGRAM_COLUMNS))})
+    ON CONFLICT(date) DO UPDATE SET
+        {', '.join(f'{c} = {c} + excluded.{c}' for c in HISTOGRAM_COLUMNS)}
+'''
+
+
+class WinCounter:
+    """Agrega incrementos por dia e envia-os periodicamente para o backend."""
+
+    def __init__(self, redis_client, database_file):
+        self.redis_client = redis_client
+        self.database_file = database_file
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = {}      # dia -> [delta, nome da solução, histograma]
+        self._pending_total = 0
+        self._inflight = {}     # lote em envio (mesmo formato), contado nas leituras até o total estar em cache
+        self._cache = {}        # dia -> (valor no backend, instante da leitura)
+        self._stats_cache = {}  # dia -> (histograma no backend, instante da leitura)
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        atexit.register(self.flush)
+
+    # --- API pública ---
+
+    def increment(self, solution_name, day=None, guesses=None):
+        """Regista um acerto (com `guesses` palpites, se conhecido) e devolve a contagem estimada do dia."""
+        return self.get(self.record(solution_name, day, guesses))
+
+    def record(self, solution_name, day=None, guesses=None):
+        """Regista um acerto só em memória (sem ler o backend). Devolve o dia."""
+        day = day or datetime.utcnow().date().isoformat()
+        self._ensure_flusher()
+        with self._lock:
+            entry = self._pending.setdefault(day, [0, solution_name, [0] * HISTOGRAM_BUCKETS])
+            entry[0] += 1
+            if guesses:
+                entry[2][histogram_bucket(guesses)] += 1
+            self._pending_total += 1
+            should_flush = self._pending_total >= FLUSH_THRESHOLD
+        if should_flush:
+            self._wakeup.set()
+        return day
+
+    def get(self, day=None):
+        """Contagem do dia: valor em cache (no máximo CACHE_TTL s) + pendentes locais."""
+        day = day or datetime.utcnow().date().isoformat()
+        value = self.cached(day)
+        if value is None:
+            read_at = time.monotonic()
+            value = self.remember(day, self._read_backend(day), read_at)
+        return value
+
+    def cached(self, day):
+        """Contagem do dia se o valor em cache ainda for válido; None se for preciso ler o backend."""
+        # Cache, pendentes e lote em envio lidos sob o mesmo lock: um flush não fica contado a meias
+        with self._lock:
+            cached = self._cache.get(day)
+            if cached is None or time.monotonic() - cached[1] > CACHE_TTL:
+                return None
+            return cached[0] + self._unflushed_count(day)
+
+    def remember(self, day, value, read_at=None):
+        """Guarda o valor lido do backend (None = falhou; mantém o anterior) e devolve a contagem do dia.
+
+        `read_at` é o instante (time.monotonic) em que a leitura começou: um
+        valor em cache gravado depois disso (por um flush ou outra leitura)
+        é mais recente e não é substituído.
+        """
+        with self._lock:
+            cached = self._cache.get(day)
+            if cached is not None and (value is None or day in self._inflight
+                                       or (read_at is not None and cached[1] >= read_at)):
+                # Com um envio em curso a leitura pode já incluir o lote; o flush grava o total certo
+                value = cached[0]
+            else:
+                value = value or 0
+                self._cache[day] = (value, time.monotonic())
+            return value + self._unflushed_count(day)
+
+    def histogram(self, day=None):
+        """Histograma de palpites do dia: valor em cache (no máximo STATS_CACHE_TTL s) + pendentes locais."""
+        day = day or datetime.utcnow().date().isoformat()
+        cached = self._stats_cache.get(day)
+        if cached is None or time.monotonic() - cached[1] > STATS_CACHE_TTL:
+            values = self._read_histograms([day])
+            value = values[day][1] if values is not None else (cached[0] if cached else [0] * HISTOGRAM_BUCKETS)
+            cached = (value, time.monotonic())
+            self._stats_cache[day] = cached
+        return self._with_pending(day, cached[0])
+
+    def history(self, days):
+        """{dia: (contagem, histograma)} para vários dias, lidos numa única ida ao backend."""
+        values = self._read_histograms(days)
+        if values is None:
+            return None
+        return {day: (count + self._pending_count(day), self._with_pending(day, histogram))
+                for day, (count, histogram) in values.items()}
+
+    def flush(self):
+        """Envia todos os incrementos pendentes. Em caso de falha ficam para a próxima vez."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._pending_total = 0
+                self._inflight = batch
+            if not batch:
+                return True
+
+            totals = None
+            if self._use_redis('flush'):
+                try:
+                    with BACKEND_DURATION.time(backend='redis', operation='flush'):
+                        totals = self._flush_redis(batch)
+                except Exception as e:
+                    print(f"ERRO flush contador (redis): {e}")
+                    ERRORS.inc(source='redis_flush')
+                    REDIS_FALLBACKS.inc(operation='flush')
+                    # fallback to sqlite
+            if totals is None:
+                try:
+                    with BACKEND_DURATION.time(backend='sqlite', operation='flush'):
+                        totals = self._flush_sqlite(batch)
+                except Exception as e:
+                    print(f"ERRO flush contador: {e}")
+                    ERRORS.inc(source='sqlite_flush')
+                    self._requeue(batch)
+                    return False
+
+            now = time.monotonic()
+            with self._lock:
+                # Totais novos e fim do lote em envio de uma só vez: as leituras nunca recuam
+                for day, total in totals.items():
+                    self._cache[day] = (total, now)
+                    # O histograma em cache deixou de incluir estes incrementos
+                    self._stats_cache.pop(day, None)
+                self._inflight = {}
+            return True
+
+    # --- Backends ---
+
+    def _use_redis(self, operation):
+        """True se houver Redis e o disjuntor (redis_backend.ResilientRedis) estiver fechado."""
+        if not self.redis_client:
+            return False
+        if getattr(self.redis_client, 'available', True):
+            return True
+        # Disjuntor aberto: vai direto ao SQLite sem esperar pelo timeout nem registar o erro
+        REDIS_FALLBACKS.inc(operation=operation)
+        return False
+
+    def _flush_redis(self, batch):
+        pipe = self.redis_client.pipeline(transaction=False)
+        days = list(batch)
+        count_replies = []
+        for day in days:
+            delta, solution_name, histogram = batch[day]
+            count_replies.append(len(pipe))
+            pipe.incrby(redis_count_key(day), delta)
+            # store solution name for reference (non-critical)
+            pipe.setnx(redis_solution_key(day), solution_name)
+            for bucket, amount in enumerate(histogram):
+                if amount:
+                    pipe.hincrby(redis_histogram_key(day), bucket + 1, amount)
+        replies = pipe.execute()
+        totals = {day: int(replies[i]) for i, day in zip(count_replies, days)}
+        # Avisa os outros workers (live.TodayBroadcaster) dos novos totais (non-critical)
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for day, total in totals.items():
+                pipe.publish(COUNT_CHANNEL, f"{day}:{total}")
+            pipe.execute()
+        except Exception:
+            pass
+        return totals
+
+    def _flush_sqlite(self, batch):
+        conn = get_db_connection(self.database_file)
+        with conn:
+            conn.executemany('''
+                INSERT INTO daily_stats (date, solution_name, correct_count)
+                VALUES (?, ?, ?)
+                ON CONFLICT(date) DO UPDATE SET
+                    correct_count = correct_count + excluded.correct_count,
+                    solution_name = excluded.solution_name
+            ''', [(day, name, delta) for day, (delta, name, _) in batch.items()])
+            histograms = [(day, *histogram) for day, (_, _, histogram) in batch.items() if any(histogram)]
+            if histograms:
+                conn.executemany(_HISTOGRAM_UPSERT, histograms)
+        placeholders = ','.join('?' * len(batch))
+        rows = conn.execute(
+            f'SELECT date, correct_count FROM daily_stats WHERE date IN ({placeholders})',
+            list(batch)).fetchall()
+        return {row['date']: row['correct_count'] for row in rows}
+
+    def _read_backend(self, day):
+        if self._use_redis('read'):
+            try:
+                with BACKEND_DURATION.time(backend='redis', operation='read'):
+                    val = self.redis_client.get(redis_count_key(day))
+                return int(val) if val else 0
+            except Exception as e:
+                print(f"ERRO get_today_correct_count (redis): {e}")
+                ERRORS.inc(source='redis_read')
+                REDIS_FALLBACKS.inc(operation='read')
+                # fallback to sqlite
+        return self.read_sqlite(day)
+
+    def read_sqlite(self, day):
+        """Contagem do dia no SQLite (None se falhar)."""
+        try:
+            with BACKEND_DURATION.time(backend='sqlite', operation='read'):
+                conn = get_db_connection(self.database_file, readonly=True)
+                row = conn.execute('SELECT correct_count FROM daily_stats WHERE date = ?', (day,)).fetchone()
+            return row['correct_count'] if row else 0
+        except Exception as e:
+            print(f"ERRO get_today_correct_count: {e}")
+            ERRORS.inc(source='sqlite_read')
+            return None
+
+    def _read_histograms(self, days):
+        """{dia: (contagem, histograma)} no backend, ou None se nenhum backend responder."""
+        if self._use_redis('read_histogram'):
+            try:
+                with BACKEND_DURATION.time(backend='redis', operation='read_histogram'):
+                    pipe = self.redis_client.pipeline(transaction=False)
+                    for day in days:
+                        pipe.get(redis_count_key(day))
+                        pipe.hgetall(redis_histogram_key(day))
+                    replies = pipe.execute()
+                result = {}
+                for i, day in enumerate(days):
+                    count, fields = replies[2 * i], replies[2 * i + 1]
+                    histogram = [0] * HISTOGRAM_BUCKETS
+                    for field, amount in fields.items():
+                        histogram[histogram_bucket(field)] += int(amount)
+                    result[day] = (int(count) if count else 0, histogram)
+                return result
+            except Exception as e:
+                print(f"ERRO leitura do histograma (redis): {e}")
+                ERRORS.inc(source='redis_read')
+                REDIS_FALLBACKS.inc(operation='read_histogram')
+                # fallback to sqlite
+        try:
+            with BACKEND_DURATION.time(backend='sqlite', operation='read_histogram'):
+                conn = get_db_connection(self.database_file, readonly=True)
+                placeholders = ','.join('?' * len(days))
+                rows = conn.execute(f'''
+                    SELECT d.date, d.correct_count, {', '.join('h.' + c for c in HISTOGRAM_COLUMNS)}
+                    FROM daily_stats d LEFT JOIN daily_guess_histogram h ON h.date = d.date
+                    WHERE d.date IN ({placeholders})
+                ''', list(days)).fetchall()
+            result = {day: (0, [0] * HISTOGRAM_BUCKETS) for day in days}
+            for row in rows:
+                result[row[0]] = (row[1] or 0, [value or 0 for value in row[2:]])
+            return result
+        except Exception as e:
+            print(f"ERRO leitura do histograma: {e}")
+            ERRORS.inc(source='sqlite_read')
+            return None
+
+    def _pending_count(self, day):
+        with self._lock:
+            return self._unflushed_count(day)
+
+    def _unflushed_count(self, day):
+        """Incrementos deste processo ainda não incluídos na cache (pendentes e em envio). Chamar com o lock."""
+        return sum(entries[day][0] for entries in (self._pending, self._inflight) if day in entries)
+
+    def _with_pending(self, day, histogram):
+        histogram = list(histogram)
+        with self._lock:
+            for entries in (self._pending, self._inflight):
+                if day in entries:
+                    histogram = [a + b for a, b in zip(histogram, entries[day][2])]
+        return histogram
+
+    # --- Thread de envio ---
+
+    def _requeue(self, batch):
+        with self._lock:
+            self._inflight = {}
+            for day, (delta, solution_name, histogram) in batch.items():
+                entry = self._pending.setdefault(day, [0, solution_name, [0] * HISTOGRAM_BUCKETS])
+                entry[0] += delta
+                entry[2] = [a + b for a, b in zip(entry[2], histogram)]
+                self._pending_total += delta
+
+    def _ensure_flusher(self):
+        # Threads não sobrevivem ao fork dos workers do gunicorn: uma por processo
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='win-counter-flush', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(FLUSH_INTERVAL)
+            self._wakeup.clear()
+            self.flush()
@@ -0,0 +1,149 @@
+"""Migração das contagens diárias entre o SQLite (daily_stats) e o Redis.
+
+Os dois sentidos trabalham em blocos e guardam um checkpoint no Redis, para
+que uma execução interrompida continue onde parou:
+
+    python counts_migration.py to-redis   [--chunk-size 500] [--restart]
+    python counts_migration.py to-sqlite  [--chunk-size 500] [--restart]
+
+SQLite -> Redis: o cursor é lido em blocos e cada bloco é escrito com um
+único MSET (contagens e nomes) e os histogramas de palpites numa transação
+MULTI/EXEC que grava também o checkpoint. Redis -> SQLite: as chaves
+`eternaldle:daily:*:count` são percorridas com SCAN e cada bloco é gravado
+com um upsert em lote por tabela.
+"""
+import argparse
+import os
+import sys
+
+from counters import histogram_bucket, redis_count_key, redis_histogram_key, redis_solution_key
+from db import HISTOGRAM_BUCKETS, HISTOGRAM_COLUMNS
+
+CHECKPOINT_TO_REDIS = 'eternaldle:migrate:to_redis:last_date'
+CHECKPOINT_TO_SQLITE = 'eternaldle:migrate:to_sqlite:cursor'
+DEFAULT_CHUNK_SIZE = 500
+
+
+def _print_progress(direction, done):
+    print(f"[{direction}] {done} dias migrados")
+
+
+def sqlite_to_redis(conn, redis_client, chunk_size=DEFAULT_CHUNK_SIZE, restart=False,
+                    progress=_print_progress):
+    """Copia daily_stats para o Redis. Devolve o número de dias escritos nesta execução."""
+    if restart:
+        redis_client.delete(CHECKPOINT_TO_REDIS)
+    last_date = redis_client.get(CHECKPOINT_TO_REDIS) or ''
+
+    cur = conn.execute(f'''
+        SELECT d.date, d.correct_count, d.solution_name, {', '.join('h.' + c for c in HISTOGRAM_COLUMNS)}
+        FROM daily_stats d LEFT JOIN daily_guess_histogram h ON h.date = d.date
+        WHERE d.date > ? ORDER BY d.date
+    ''', (last_date,))
+    done = 0
+    while True:
+        rows = cur.fetchmany(chunk_size)
+        if not rows:
+            break
+        mapping = {}
+        histograms = {}
+        for date, count, solution_name, *histogram in rows:
+            mapping[redis_count_key(date)] = int(count or 0)
+            if solution_name:
+                mapping[redis_solution_key(date)] = solution_name
+            fields = {bucket + 1: amount for bucket, amount in enumerate(histogram) if amount}
+            if fields:
+                histograms[redis_histogram_key(date)] = fields
+        # Bloco e checkpoint gravados atomicamente
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.mset(mapping)
+        for key, fields in histograms.items():
+            pipe.delete(key)
+            pipe.hset(key, mapping=fields)
+        pipe.set(CHECKPOINT_TO_REDIS, rows[-1][0])
+        pipe.execute()
+        done += len(rows)
+        if progress:
+            progress('to-redis', done)
+
+    redis_client.delete(CHECKPOINT_TO_REDIS)
+    return done
+
+
+def redis_to_sqlite(redis_client, conn, chunk_size=DEFAULT_CHUNK_SIZE, restart=False,
+                    progress=_print_progress):
+    """Copia as contagens do Redis para daily_stats (o Redis prevalece). Devolve o número de dias."""
+    if restart:
+        redis_client.delete(CHECKPOINT_TO_SQLITE)
+    cursor = int(redis_client.get(CHECKPOINT_TO_SQLITE) or 0)
+    done = 0
+    while True:
+        cursor, keys = redis_client.scan(cursor=cursor, match=redis_count_key('*'), count=chunk_size)
+        if keys:
+            days = [key.split(':')[2] for key in keys]
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.mget(keys + [redis_solution_key(day) for day in days])
+            for day in days:
+                pipe.hgetall(redis_histogram_key(day))
+            values, *histogram_fields = pipe.execute()
+            counts, names = values[:len(keys)], values[len(keys):]
+            rows = [(day, name, int(count)) for day, count, name in zip(days, counts, names)
+                    if count is not None]
+            histograms = []
+            for day, fields in zip(days, histogram_fields):
+                if fields:
+                    histogram = [0] * HISTOGRAM_BUCKETS
+                    for field, amount in fields.items():
+                        histogram[histogram_bucket(field)] += int(amount)
+                    histograms.append((day, *histogram))
+            with conn:
+                conn.executemany('''
+                    INSERT INTO daily_stats (date, solution_name, correct_count)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT(date) DO UPDATE SET
+                        correct_count = excluded.correct_count,
+                        solution_name = COALESCE(excluded.solution_name, daily_stats.solution_name)
+                ''', rows)
+                conn.executemany(f'''
+                    INSERT OR REPLACE INTO daily_guess_histogram (date, {', '.join(HISTOGRAM_COLUMNS)})
+                    VALUES (?, {', '.join('?' * len(HISTOGRAM_COLUMNS))})
+                ''', histograms)
+            done += len(rows)
+            if progress:
+                progress('to-sqlite', done)
+        if cursor == 0:
+            break
+        redis_client.set(CHECKPOINT_TO_SQLITE, cursor)
+
+    redis_client.delete(CHECKPOINT_TO_SQLITE)
+    return done
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Migra as contagens diárias entre SQLite e Redis.')
+    parser.add_argument('direction', choices=['to-redis', 'to-sqlite'])
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--restart', action='store_true', help='ignora o checkpoint e começa do início')
+    args = parser.parse_args(argv)
+
+    redis_url = os.environ.get('REDIS_URL') or os.environ.get('UPSTASH_REDIS_URL')
+    if not redis_url:
+        print('REDIS_URL não definido.')
+        return 2
+
+    import redis
+    import db
+    redis_client = redis.from_url(redis_url, decode_responses=True)
+    db.migrate(db.DATABASE_FILE)
+    if args.direction == 'to-redis':
+        conn = db.get_db_connection(db.DATABASE_FILE, readonly=True)
+        total = sqlite_to_redis(conn, redis_client, args.chunk_size, args.restart)
+    else:
+        conn = db.get_db_connection(db.DATABASE_FILE)
+        total = redis_to_sqlite(redis_client, conn, args.chunk_size, args.restart)
+    print(f"Concluído: {total} dias migrados ({args.direction}).")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
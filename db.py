@@ -0,0 +1,185 @@
+"""Acesso à base de dados SQLite.
+
+Cada thread reutiliza as suas próprias ligações (uma de leitura, aberta em
+modo só-de-leitura, e uma de escrita), em modo WAL para que os workers do
+gunicorn possam ler enquanto outro escreve o contador. As alterações de
+esquema são aplicadas por `migrate()`, versionadas com PRAGMA user_version.
+"""
+import os
+import sqlite3
+import threading
+
+# Configuração de caminhos (ETERNALDLE_DB permite usar outro ficheiro, ex.: benchmarks)
+project_root = os.path.dirname(os.path.abspath(__file__))
+DATABASE_FILE = os.environ.get('ETERNALDLE_DB') or os.path.join(project_root, 'eternaldle.db')
+
+# Statements preparados em cache por ligação
+CACHED_STATEMENTS = 256
+BUSY_TIMEOUT = 5.0
+# Colunas do histograma de palpites por dia (a última conta também os valores acima)
+HISTOGRAM_BUCKETS = 10
+HISTOGRAM_COLUMNS = tuple(f'g{i}' for i in range(1, HISTOGRAM_BUCKETS + 1))
+
+_local = threading.local()
+
+
+def _file_id(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_dev, st.st_ino)
+
+
+def connect(path=DATABASE_FILE, readonly=False):
+    """Abre uma nova ligação configurada (WAL, synchronous=NORMAL, Row)."""
+    if readonly:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=BUSY_TIMEOUT,
+                               cached_statements=CACHED_STATEMENTS, check_same_thread=False)
+    else:
+        conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT,
+                               cached_statements=CACHED_STATEMENTS, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def get_db_connection(path=DATABASE_FILE, readonly=False):
+    """Devolve a ligação desta thread (reutilizada entre pedidos; não a feche).
+
+    A ligação é reaberta se a thread mudou de processo (fork do gunicorn) ou
+    se o ficheiro foi substituído (ex.: setup_database.py com rename atómico).
+    """
+    if readonly and not os.path.exists(path):
+        raise sqlite3.OperationalError(f"base de dados não encontrada: {path}")
+    cache = getattr(_local, 'connections', None)
+    if cache is None or getattr(_local, 'pid', None) != os.getpid():
+        cache = _local.connections = {}
+        _local.pid = os.getpid()
+
+    key = (path, readonly)
+    file_id = _file_id(path)
+    entry = cache.get(key)
+    if entry is not None:
+        conn, opened_id = entry
+        if opened_id == file_id:
+            return conn
+        conn.close()
+
+    conn = connect(path, readonly=readonly)
+    cache[key] = (conn, file_id if file_id is not None else _file_id(path))
+    return conn
+
+
+# --- Versão do catálogo ---
+
+def catalog_stamp_path(path=DATABASE_FILE):
+    """Ficheiro ao lado da base de dados com a versão do catálogo.
+
+    Os workers só fazem `stat` a este ficheiro para saber se devem recarregar
+    o catálogo; no modo WAL o ficheiro principal não muda a cada escrita.
+    """
+    return path + '.catalog-version'
+
+
+def bump_catalog_version(conn):
+    """Incrementa a versão do catálogo (dentro da transação atual). Devolve a nova versão."""
+    conn.execute('''
+        INSERT INTO catalog_meta (key, value) VALUES ('version', 1)
+        ON CONFLICT(key) DO UPDATE SET value = value + 1
+    ''')
+    return conn.execute("SELECT value FROM catalog_meta WHERE key = 'version'").fetchone()[0]
+
+
+def write_catalog_stamp(path, version):
+    """Grava a versão no ficheiro de controlo (escrita atómica com rename)."""
+    stamp = catalog_stamp_path(path)
+    tmp = f"{stamp}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        f.write(f"{version}\n")
+    os.replace(tmp, stamp)
+
+
+# --- Migrações de esquema ---
+
+def _columns(conn, table):
+    return [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+
+
+def _migration_1(conn):
+    """Unifica `daily_stats` em (date, solution_name, correct_count).
+
+    O setup_database.py antigo criava (data, winners_count); o app.py criava
+    (date, solution_name, correct_count). As contagens antigas são copiadas.
+    """
+    columns = _columns(conn, 'daily_stats')
+    if columns and 'date' in columns and 'correct_count' in columns:
+        return
+    if columns:
+        conn.execute('ALTER TABLE daily_stats RENAME TO daily_stats_legacy')
+    conn.execute('''
+        CREATE TABLE daily_stats (
+            date TEXT PRIMARY KEY,
+            solution_name TEXT,
+            correct_count INTEGER DEFAULT 0
+        )
+    ''')
+    if columns:
+        date_col = 'data' if 'data' in columns else 'date'
+        count_col = 'winners_count' if 'winners_count' in columns else 'correct_count'
+        conn.execute(f'''
+            INSERT INTO daily_stats (date, solution_name, correct_count)
+            SELECT {date_col}, NULL, COALESCE({count_col}, 0) FROM daily_stats_legacy
+        ''')
+        conn.execute('DROP TABLE daily_stats_legacy')
+
+
+def _migration_2(conn):
+    """Tabela catalog_meta com a versão do catálogo (incrementada por setup_database.py)."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS catalog_meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+    ''')
+    conn.execute("INSERT OR IGNORE INTO catalog_meta (key, value) VALUES ('version', 1)")
+
+
+def _migration_3(conn):
+    """Histograma diário do número de palpites até acertar (colunas fixas g1..g10; g10 = 10 ou mais)."""
+    columns = ',\n'.join(f'            {column} INTEGER NOT NULL DEFAULT 0' for column in HISTOGRAM_COLUMNS)
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS daily_guess_histogram (
+            date TEXT PRIMARY KEY,
+{columns}
+        )
+    ''')
+
+
+MIGRATIONS = [_migration_1, _migration_2, _migration_3]
+
+
+def migrate(path=DATABASE_FILE):
+    """Aplica as migrações pendentes. Devolve a versão final do esquema."""
+    conn = connect(path)
+    # Transação explícita: o sqlite3 não abre transações para DDL por conta própria
+    conn.isolation_level = None
+    try:
+        # IMMEDIATE serializa workers a arrancar em simultâneo
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            for number, migration in enumerate(MIGRATIONS, start=1):
+                if number <= version:
+                    continue
+                migration(conn)
+                conn.execute(f'PRAGMA user_version = {number}')
+                version = number
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return version
+    finally:
+        conn.close()
@@ -0,0 +1,112 @@
+"""Comparação de atributos entre o palpite e a solução.
+
+Com N personagens só existem N×N resultados possíveis, por isso o catálogo
+pré-calcula todos os códigos de estado numa matriz compacta (um byte por
+atributo) e cada palpite passa a ser apenas uma consulta por índice.
+"""
+
+# Códigos de estado (um byte por atributo)
+INCORRECT, CORRECT, PARTIAL, HIGHER, LOWER = range(5)
+STATUS_NAMES = ('incorrect', 'correct', 'partial', 'higher', 'lower')
+
+NUMERIC_KEYS = ('ANO_DE_LANCAMENTO', 'QUANTIDADE_DE_ARMA')
+MULTI_VALUE_KEYS = ('CLASSE', 'ALCANCE')
+IGNORED_KEYS = ('IMAGEM_URL',)
+
+
+def compare_value(key, guess_value, solution_value):
+    """Devolve o código de estado de um atributo (lógica de referência do /api/guess)."""
+    if str(guess_value).lower() == str(solution_value).lower():
+        return CORRECT
+    if key in NUMERIC_KEYS:
+        try:
+            if int(guess_value) < int(solution_value): return HIGHER
+            if int(guess_value) > int(solution_value): return LOWER
+        except (TypeError, ValueError):
+            pass
+        return INCORRECT
+    if key in MULTI_VALUE_KEYS:
+        guess_parts = {part.strip().lower() for part in str(guess_value).split(',')}
+        solution_parts = {part.strip().lower() for part in str(solution_value).split(',')}
+        if guess_parts.intersection(solution_parts): return PARTIAL
+    return INCORRECT
+
+
+def compare_characters(guess_character, solution):
+    """Compara atributo a atributo dois registos completos e devolve o dict `results`."""
+    results = {}
+    for key in solution.keys():
+        if key in IGNORED_KEYS: continue
+        guess_value = guess_character.get(key)
+        status = compare_value(key, guess_value, solution.get(key))
+        results[key.lower()] = {'value': guess_value, 'status': STATUS_NAMES[status]}
+    results['imagem_url'] = {'value': guess_character['IMAGEM_URL']}
+    return results
+
+
+def _normalize(key, value):
+    """Pré-processa um valor uma única vez para a construção da matriz."""
+    text = str(value).lower()
+    if key in NUMERIC_KEYS:
+        try:
+            return text, int(value)
+        except (TypeError, ValueError):
+            return text, None
+    if key in MULTI_VALUE_KEYS:
+        return text, frozenset(part.strip() for part in text.split(','))
+    return text, None
+
+
+class FeedbackMatrix:
+    """Matriz palpite×solução de códigos de estado, construída ao carregar o catálogo."""
+
+    def __init__(self, records):
+        self.records = records
+        self.size = len(records)
+        self.keys = tuple(k for k in (records[0].keys() if records else ()) if k not in IGNORED_KEYS)
+        self.result_keys = tuple(k.lower() for k in self.keys)
+        width = len(self.keys)
+        n = self.size
+
+        codes = bytearray(n * n * width)
+        for a, key in enumerate(self.keys):
+            values = [_normalize(key, r.get(key)) for r in records]
+            numeric = key in NUMERIC_KEYS
+            multi = key in MULTI_VALUE_KEYS
+            for g, (g_text, g_extra) in enumerate(values):
+                base = g * n * width + a
+                for s, (s_text, s_extra) in enumerate(values):
+                    if g_text == s_text:
+                        code = CORRECT
+                    elif numeric:
+                        if g_extra is None or s_extra is None:
+                            code = INCORRECT
+                        elif g_extra < s_extra:
+                            code = HIGHER
+                        elif g_extra > s_extra:
+                            code = LOWER
+                        else:
+                            code = INCORRECT
+                    elif multi:
+                        code = PARTIAL if g_extra & s_extra else INCORRECT
+                    else:
+                        code = INCORRECT
+                    codes[base + s * width] = code
+        self.codes = bytes(codes)
+
+    def statuses(self, guess_index, solution_index):
+        """Códigos de estado (bytes, um por atributo) para o par palpite/solução."""
+        width = len(self.keys)
+        start = (guess_index * self.size + solution_index) * width
+        return self.codes[start:start + width]
+
+    def results(self, guess_index, solution_index):
+        """Formata o dict `results` devolvido pelo /api/guess a partir da matriz."""
+        guess_character = self.records[guess_index]
+        statuses = self.statuses(guess_index, solution_index)
+        results = {
+            result_key: {'value': guess_character[key], 'status': STATUS_NAMES[code]}
+            for key, result_key, code in zip(self.keys, self.result_keys, statuses)
+        }
+        results['imagem_url'] = {'value': guess_character['IMAGEM_URL']}
+        return results
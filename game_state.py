@@ -0,0 +1,85 @@
+"""Estado do jogo guardado no cookie de sessão num formato compacto.
+
+Em vez da linha completa da solução e dos `results` de cada palpite, a
+sessão guarda apenas números:
+
+    day     -> número do dia (desde catalog.EPOCH) da solução em jogo
+    guesses -> índices no catálogo dos personagens já chutados
+    won     -> número do dia em que a sessão acertou
+    cv      -> prefixo do hash do catálogo a que os índices se referem
+
+Os resultados são reconstruídos no servidor a partir da matriz do catálogo.
+"""
+
+# Chaves do formato antigo (linha completa da solução na sessão)
+LEGACY_KEYS = ('solution', 'solution_date', 'won_date', 'has_won_today')
+CATALOG_TAG_LENGTH = 8
+
+
+def catalog_tag(catalog):
+    return catalog.digest[:CATALOG_TAG_LENGTH]
+
+
+def reset_state(session, catalog, day):
+    """Começa um novo dia: limpa os palpites e a vitória."""
+    for key in LEGACY_KEYS:
+        session.pop(key, None)
+    session['day'] = day
+    session['guesses'] = []
+    session.pop('won', None)
+    session['cv'] = catalog_tag(catalog)
+
+
+def load_guesses(session, catalog):
+    """Índices dos palpites da sessão (vazio se o catálogo mudou entretanto)."""
+    if session.get('cv') != catalog_tag(catalog):
+        return []
+    return [i for i in session.get('guesses', []) if 0 <= i < len(catalog)]
+
+
+def solution_index(session, catalog):
+    """Índice no catálogo da solução da sessão, ou None se o jogo não foi iniciado."""
+    day = session.get('day')
+    if day is None:
+        return None
+    return catalog.index[catalog.solution_for(day)['NOME']]
+
+
+def add_guess(session, catalog, guess_index):
+    """Acrescenta um palpite à sessão (sem duplicados). Devolve False se já existia."""
+    return add_guesses(session, catalog, [guess_index]) == 1
+
+
+def add_guesses(session, catalog, guess_indices):
+    """Acrescenta vários palpites de uma só vez. Devolve quantos eram novos."""
+    guesses = load_guesses(session, catalog)
+    added = 0
+    for guess_index in guess_indices:
+        if guess_index not in guesses:
+            guesses.append(guess_index)
+            added += 1
+    if added:
+        session['guesses'] = guesses
+        session['cv'] = catalog_tag(catalog)
+        session.modified = True
+    return added
+
+
+def guesses_to_solve(session, catalog, guess_indices, solution_idx):
+    """Número de palpites distintos da sessão até acertar, contando com `guess_indices` (None se não acertou)."""
+    guesses = load_guesses(session, catalog)
+    for guess_index in guess_indices:
+        if guess_index not in guesses:
+            guesses.append(guess_index)
+    if solution_idx not in guesses:
+        return None
+    return guesses.index(solution_idx) + 1
+
+
+def guess_entry(catalog, guess_index, solution_idx):
+    """Entrada de `previousGuesses` reconstruída a partir do catálogo."""
+    return {
+        'guess': catalog.names[guess_index],
+        'results': catalog.feedback.results(guess_index, solution_idx),
+        'isCorrect': guess_index == solution_idx,
+    }
@@ -0,0 +1,231 @@
+"""Difusão em direto da contagem de acertos de hoje (Server-Sent Events).
+
+Cada worker tem um único `TodayBroadcaster`: uma thread lê o valor (ou
+recebe-o pelo pub/sub do Redis) e todos os clientes ligados esperam numa
+mesma Condition. Os clientes recebem sempre o valor mais recente, por isso
+várias alterações entre duas leituras chegam como um único evento.
+
+Clientes que não são threads (o event loop do asgi.py) registam-se com
+`listen()` e são avisados por callback a cada novo valor.
+"""
+import os
+import threading
+import time
+from datetime import datetime
+
+# Canal onde counters.WinCounter publica os totais após cada envio
+COUNT_CHANNEL = 'eternaldle:daily:count:updates'
+
+# Intervalo entre leituras do contador (segundos)
+TICK_INTERVAL = float(os.environ.get('LIVE_TICK_INTERVAL', '2.0'))
+# Comentário SSE enviado para manter a ligação e detetar clientes desligados
+HEARTBEAT_INTERVAL = float(os.environ.get('LIVE_HEARTBEAT_INTERVAL', '15.0'))
+# Cada ligação é terminada ao fim deste tempo; o EventSource volta a ligar sozinho
+MAX_STREAM_SECONDS = float(os.environ.get('LIVE_MAX_STREAM_SECONDS', '300'))
+# Limite de clientes em simultâneo por worker
+MAX_CLIENTS = int(os.environ.get('LIVE_MAX_CLIENTS', '1000'))
+# Sugestão de reconexão enviada ao browser (milissegundos)
+RETRY_MS = 5000
+
+# Linhas SSE enviadas aos clientes
+RETRY_EVENT = f"retry: {RETRY_MS}\n\n"
+KEEP_ALIVE_EVENT = ": keep-alive\n\n"
+
+
+def count_event(value):
+    return f"event: todayCorrectCount\ndata: {value}\n\n"
+
+
+class TodayBroadcaster:
+    """Uma leitura por tick no backend, partilhada por todos os clientes SSE do worker."""
+
+    def __init__(self, read_value, redis_client=None):
+        self.read_value = read_value
+        self.redis_client = redis_client
+        self._cond = threading.Condition()
+        self._value = None
+        self._day = None
+        self._version = 0
+        self._clients = 0
+        self._listeners = set()
+        self._thread = None
+        self._pid = None
+
+    @property
+    def clients(self):
+        return self._clients
+
+    def snapshot(self):
+        """(versão, valor) atuais; a versão muda a cada novo valor publicado."""
+        with self._cond:
+            return self._version, self._value
+
+    def publish(self, value):
+        """Atualiza o valor e acorda os clientes.
+
+        Dentro do mesmo dia a contagem só sobe: leituras em cache mais antigas
+        do que uma mensagem do pub/sub não fazem o valor recuar.
+        """
+        day = datetime.utcnow().date().isoformat()
+        with self._cond:
+            if value is None or (day == self._day and value <= self._value):
+                return
+            self._value = value
+            self._day = day
+            self._version += 1
+            self._cond.notify_all()
+            listeners = list(self._listeners)
+        for callback in listeners:
+            try:
+                callback()
+            except Exception as e:
+                print(f"ERRO broadcaster (listener): {e}")
+
+    def stream(self):
+        """Eventos SSE para um cliente (um `ClientStream`). Devolve None se o worker estiver cheio.
+
+        O lugar do cliente só é devolvido por `ClientStream.close()`: quem
+        serve a resposta tem de o chamar, mesmo que nunca a itere (ex.: HEAD).
+        """
+        with self._cond:
+            if self._clients >= MAX_CLIENTS:
+                return None
+            self._clients += 1
+        self._ensure_poller()
+        return ClientStream(self)
+
+    def listen(self, callback):
+        """Regista `callback()`, chamado (noutra thread) a cada novo valor.
+
+        Conta como um cliente do stream. Devolve False se o worker estiver cheio.
+        """
+        with self._cond:
+            if self._clients >= MAX_CLIENTS:
+                return False
+            self._clients += 1
+            self._listeners.add(callback)
+        self._ensure_poller()
+        return True
+
+    def unlisten(self, callback):
+        with self._cond:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+                self._clients -= 1
+
+    def _release(self):
+        with self._cond:
+            self._clients -= 1
+
+    def _events(self):
+        started = time.monotonic()
+        yield RETRY_EVENT
+        if self._value is None:
+            self.publish(self.read_value())
+        seen = -1
+        while time.monotonic() - started < MAX_STREAM_SECONDS:
+            with self._cond:
+                if self._version == seen:
+                    self._cond.wait(HEARTBEAT_INTERVAL)
+                version, value = self._version, self._value
+            if version != seen and value is not None:
+                seen = version
+                yield count_event(value)
+            else:
+                yield KEEP_ALIVE_EVENT
+
+    # --- Thread de leitura ---
+
+    def _ensure_poller(self):
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._cond:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            target = self._run_redis if self.redis_client else self._run_polling
+            self._thread = threading.Thread(target=target, name='today-broadcaster', daemon=True)
+            self._thread.start()
+
+    def _keep_running(self):
+        # Termina quando não há clientes; o próximo cliente volta a arrancar a thread.
+        # Feito sob o lock para não perder um cliente que chegue no mesmo instante.
+        with self._cond:
+            if self._clients > 0:
+                return True
+            self._thread = None
+            return False
+
+    def _tick(self):
+        try:
+            self.publish(self.read_value())
+        except Exception as e:
+            print(f"ERRO broadcaster (leitura): {e}")
+
+    def _run_polling(self):
+        while self._keep_running():
+            self._tick()
+            time.sleep(TICK_INTERVAL)
+
+    def _run_redis(self):
+        try:
+            pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(COUNT_CHANNEL)
+        except Exception as e:
+            print(f"ERRO broadcaster (redis pub/sub): {e}")
+            return self._run_polling()
+        try:
+            last_tick = 0.0
+            while self._keep_running():
+                message = pubsub.get_message(timeout=TICK_INTERVAL)
+                if message and message.get('type') == 'message':
+                    self._on_message(message.get('data'))
+                # O tick continua a cobrir a mudança de dia e mensagens perdidas
+                if time.monotonic() - last_tick >= TICK_INTERVAL:
+                    self._tick()
+                    last_tick = time.monotonic()
+        except Exception as e:
+            print(f"ERRO broadcaster (redis pub/sub): {e}")
+            return self._run_polling()
+        finally:
+            try:
+                pubsub.close()
+            except Exception:
+                pass
+
+    def _on_message(self, data):
+        # Formato: "<dia ISO>:<total>"; totais de outros dias são ignorados
+        try:
+            day, total = str(data).rsplit(':', 1)
+            if day == datetime.utcnow().date().isoformat():
+                self.publish(int(total))
+        except ValueError:
+            pass
+
+
+class ClientStream:
+    """Eventos de um cliente SSE; `close()` devolve o lugar no broadcaster (uma única vez).
+
+    O `finally` de um gerador não corre se ele for fechado antes de começar,
+    por isso o lugar não pode ser devolvido dentro de `_events()`.
+    """
+
+    def __init__(self, broadcaster):
+        self._broadcaster = broadcaster
+        self._events = broadcaster._events()
+        self._closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._events)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._events.close()
+        finally:
+            self._broadcaster._release()
@@ -0,0 +1,143 @@
+"""Métricas em memória (por worker) expostas no formato de texto do Prometheus.
+
+Histogramas de buckets fixos e contadores simples, sem dependências externas.
+Cada observação custa um bisect e um incremento sob um lock.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Buckets de latência em segundos (0,5 ms a 5 s)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# Buckets do tamanho do cookie de sessão em bytes (limite dos browsers: 4096)
+SIZE_BUCKETS = (64, 128, 256, 512, 1024, 2048, 3072, 4096)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def _format_number(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, '') for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f'{self.name}{_format_labels(self.labels, key)} {_format_number(value)}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}   # labels -> [contagem por bucket..., soma, total]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, '') for n in self.labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series):
+                cumulative += count
+                labels = _format_labels(self.labels, key, ('le', _format_number(float(bound))))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labels, key)
+            lines.append(f'{self.name}_sum{labels} {series[-2]!r}')
+            lines.append(f'{self.name}_count{labels} {series[-1]}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self.register(Counter(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+REQUEST_DURATION = REGISTRY.histogram(
+    'eternaldle_request_duration_seconds', 'Tempo total do pedido HTTP (inclui sessão e JSON).',
+    labels=('endpoint', 'method', 'status'))
+STAGE_DURATION = REGISTRY.histogram(
+    'eternaldle_stage_duration_seconds', 'Tempo por etapa interna do pedido.',
+    labels=('stage',))
+BACKEND_DURATION = REGISTRY.histogram(
+    'eternaldle_backend_duration_seconds', 'Tempo das operações no Redis e no SQLite.',
+    labels=('backend', 'operation'))
+SESSION_COOKIE_BYTES = REGISTRY.histogram(
+    'eternaldle_session_cookie_bytes', 'Tamanho do cookie de sessão enviado.',
+    buckets=SIZE_BUCKETS)
+REDIS_FALLBACKS = REGISTRY.counter(
+    'eternaldle_redis_fallbacks_total', 'Operações que caíram do Redis para o SQLite.',
+    labels=('operation',))
+REDIS_CIRCUIT_OPENED = REGISTRY.counter(
+    'eternaldle_redis_circuit_opened_total', 'Vezes que o disjuntor do Redis abriu.')
+ERRORS = REGISTRY.counter(
+    'eternaldle_errors_total', 'Erros tratados, por origem.',
+    labels=('source',))
@@ -0,0 +1,70 @@
+"""Normalização de nomes e índice de prefixos para sugestões.
+
+Os nomes são comparados sem maiúsculas, acentos, espaços nem pontuação
+("li dailin", "LiDailin" e "Lì-Dailin" são o mesmo nome). O índice é uma
+lista ordenada de chaves normalizadas pesquisada com bisect: cada nome tem
+uma chave para o nome completo e uma por cada palavra seguinte, para que
+"dailin" ou "anh" também encontrem "Li Dailin" e "Ly Anh".
+"""
+import re
+import unicodedata
+from bisect import bisect_left
+
+# Número de sugestões devolvidas por omissão e máximo aceite
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+
+_NON_ALNUM = re.compile(r'[\W_]+')
+
+
+def _words(text):
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return [w for w in _NON_ALNUM.split(stripped.casefold()) if w]
+
+
+def normalize_name(text):
+    """Chave de comparação de um nome: minúsculas, sem acentos, só letras e dígitos."""
+    return ''.join(_words(text))
+
+
+class NameIndex:
+    """Pesquisa por prefixo sobre os nomes do catálogo (construído uma vez por catálogo)."""
+
+    def __init__(self, names):
+        self.names = tuple(names)
+        # Nome completo normalizado -> índice no catálogo
+        self.exact = {}
+        entries = []
+        for idx, name in enumerate(self.names):
+            words = _words(name)
+            self.exact.setdefault(''.join(words), idx)
+            # rank 0: início do nome; rank 1: início de uma palavra seguinte
+            entries.append((''.join(words), 0, idx))
+            for i in range(1, len(words)):
+                entries.append((''.join(words[i:]), 1, idx))
+        entries.sort()
+        self._keys = [key for key, _, _ in entries]
+        self._entries = [(rank, idx) for _, rank, idx in entries]
+
+    def lookup(self, text):
+        """Índice do nome igual a `text` depois de normalizado, ou None."""
+        return self.exact.get(normalize_name(text))
+
+    def suggest(self, query, limit=DEFAULT_LIMIT, exclude=()):
+        """Índices dos nomes que começam por `query` (ou com uma palavra que começa por ela).
+
+        Os nomes cujo início coincide aparecem primeiro, depois por ordem alfabética.
+        """
+        prefix = normalize_name(query)
+        if not prefix or limit <= 0:
+            return []
+        found = {}
+        pos = bisect_left(self._keys, prefix)
+        while pos < len(self._keys) and self._keys[pos].startswith(prefix):
+            rank, idx = self._entries[pos]
+            if idx not in exclude and rank < found.get(idx, 2):
+                found[idx] = rank
+            pos += 1
+        ranked = sorted(found, key=lambda idx: (found[idx], self.names[idx].casefold()))
+        return ranked[:limit]
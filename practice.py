@@ -0,0 +1,64 @@
+"""Modo de treino sem estado no servidor.
+
+Cada ronda é um token compacto `<seed>.<versão do catálogo>.<assinatura>`,
+assinado com HMAC-SHA256 sobre a SECRET_KEY. A solução é derivada do seed
+com uma chave (`HMAC(SECRET_KEY, seed) % len(catalog)`), por isso qualquer
+worker valida um palpite só com CPU: sem sessão, sem leitura da base de
+dados e sem tocar nos contadores diários. O seed vai em claro no token, mas
+sem a SECRET_KEY não diz qual é a solução.
+"""
+import base64
+import hashlib
+import hmac
+import secrets
+
+# Bits aleatórios do seed de cada ronda
+SEED_BITS = 48
+# Bytes da assinatura HMAC mantidos no token (96 bits)
+SIGNATURE_BYTES = 12
+# Separam estes usos da SECRET_KEY entre si e de outros usos da mesma chave
+_CONTEXT = b'eternaldle-practice:'
+_SOLUTION_CONTEXT = b'eternaldle-practice-solution:'
+
+
+def _digest(secret, context, message):
+    key = secret.encode('utf-8') if isinstance(secret, str) else secret
+    return hmac.new(key, context + message.encode('ascii'), hashlib.sha256).digest()
+
+
+def _signature(secret, message):
+    digest = _digest(secret, _CONTEXT, message)
+    return base64.urlsafe_b64encode(digest[:SIGNATURE_BYTES]).decode('ascii').rstrip('=')
+
+
+def issue_token(secret, catalog, seed=None):
+    """Novo token de ronda para `catalog` (seed aleatório se não for dado)."""
+    if seed is None:
+        seed = secrets.randbits(SEED_BITS)
+    message = f"{seed:x}.{catalog.version}"
+    return f"{message}.{_signature(secret, message)}"
+
+
+def read_token(secret, token):
+    """Devolve (seed, versão do catálogo) de um token válido, ou None."""
+    # Só ASCII: o compare_digest não aceita outro texto (e uma assinatura válida nunca o tem)
+    if not isinstance(token, str) or not token.isascii():
+        return None
+    message, _, signature = token.rpartition('.')
+    seed_text, _, version = message.partition('.')
+    if not seed_text or not version or not signature:
+        return None
+    try:
+        expected = _signature(secret, message)
+        seed = int(seed_text, 16)
+    except ValueError:
+        return None
+    if not hmac.compare_digest(signature, expected):
+        return None
+    return seed, version
+
+
+def solution_index(secret, catalog, seed):
+    """Índice no catálogo da solução de uma ronda (não se deduz do seed sem a `secret`)."""
+    digest = _digest(secret, _SOLUTION_CONTEXT, f"{seed:x}")
+    return int.from_bytes(digest[:8], 'big') % len(catalog)
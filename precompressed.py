@@ -0,0 +1,43 @@
+"""Respostas pré-comprimidas (gzip e, se disponível, brotli) calculadas uma única vez."""
+import gzip
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele só servimos gzip
+    brotli = None
+
+# Ordem de preferência quando o cliente aceita várias codificações
+PREFERRED_ENCODINGS = ('br', 'gzip')
+
+
+def encode_variants(data):
+    """Devolve {codificação: bytes} para `data` (inclui sempre 'identity')."""
+    variants = {'identity': data, 'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(data, quality=11)
+    return variants
+
+
+def pick_encoding(accept_encodings, variants):
+    """Escolhe a melhor variante aceite pelo cliente (`request.accept_encodings`)."""
+    for encoding in PREFERRED_ENCODINGS:
+        if encoding in variants and accept_encodings[encoding] > 0:
+            return encoding
+    return 'identity'
+
+
+def variant_etag(etag, encoding):
+    """ETag de uma variante: cada codificação tem bytes diferentes, logo um ETag próprio."""
+    return etag if encoding == 'identity' else f'{etag}-{encoding}'
+
+
+def matching_etag(if_none_match, etag, variants, encoding):
+    """ETag do If-None-Match que corresponde a uma das variantes (None se nenhuma).
+
+    Prefere a variante que seria enviada (`encoding`); uma cache com várias variantes
+    guardadas envia todos os ETags e o 304 indica qual delas reutilizar.
+    """
+    for candidate in (encoding, *variants):
+        if candidate in variants and if_none_match.contains(variant_etag(etag, candidate)):
+            return variant_etag(etag, candidate)
+    return None
@@ -0,0 +1,193 @@
+"""Cliente Redis com ligação preguiçosa, timeouts e disjuntor (circuit breaker).
+
+O `ResilientRedis` comporta-se como um `redis.Redis` (os comandos são
+delegados), mas:
+
+    - só cria o pool de ligações no primeiro uso (o arranque dos workers
+      não espera pelo Redis);
+    - usa timeouts curtos de ligação e de leitura e um único pool por processo;
+    - depois de REDIS_FAILURE_THRESHOLD falhas seguidas abre o disjuntor:
+      durante a janela de espera os comandos falham de imediato com
+      `RedisUnavailable` e `available` é False, para que o chamador passe
+      diretamente ao SQLite;
+    - enquanto o disjuntor está aberto, uma thread faz PING periodicamente
+      (meio-aberto) e fecha-o quando o Redis responde, com espera
+      exponencial entre tentativas.
+"""
+import os
+import threading
+import time
+
+import redis
+from redis.backoff import NoBackoff
+from redis.retry import Retry
+
+from metrics import REDIS_CIRCUIT_OPENED
+
+# Timeouts (segundos) para abrir a ligação e para cada resposta
+CONNECT_TIMEOUT = float(os.environ.get('REDIS_CONNECT_TIMEOUT', '0.5'))
+SOCKET_TIMEOUT = float(os.environ.get('REDIS_SOCKET_TIMEOUT', '0.5'))
+# Ligações no pool partilhado de cada processo
+MAX_CONNECTIONS = int(os.environ.get('REDIS_MAX_CONNECTIONS', '32'))
+# Falhas seguidas que abrem o disjuntor
+FAILURE_THRESHOLD = int(os.environ.get('REDIS_FAILURE_THRESHOLD', '3'))
+# Espera inicial e máxima (segundos) entre tentativas com o disjuntor aberto
+BACKOFF = float(os.environ.get('REDIS_BACKOFF', '1.0'))
+MAX_BACKOFF = float(os.environ.get('REDIS_MAX_BACKOFF', '30.0'))
+
+# Erros de ligação contam para o disjuntor; erros de comando (ex.: WRONGTYPE) não
+CONNECTION_ERRORS = (redis.ConnectionError, redis.TimeoutError, OSError)
+
+
+class RedisUnavailable(redis.ConnectionError):
+    """O disjuntor está aberto: o Redis não foi contactado."""
+
+
+class ResilientRedis:
+    """Substituto de `redis.Redis` partilhado por todo o processo (ver o topo do módulo)."""
+
+    def __init__(self, url, connect_timeout=CONNECT_TIMEOUT, socket_timeout=SOCKET_TIMEOUT,
+                 max_connections=MAX_CONNECTIONS, failure_threshold=FAILURE_THRESHOLD,
+                 backoff=BACKOFF, max_backoff=MAX_BACKOFF):
+        self.url = url
+        self.connect_timeout = connect_timeout
+        self.socket_timeout = socket_timeout
+        self.max_connections = max_connections
+        self.failure_threshold = failure_threshold
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._client = None
+        self._failures = 0
+        self._open = False
+        self._probe = None
+        self._probe_pid = None
+
+    # --- Estado do disjuntor ---
+
+    @property
+    def available(self):
+        """False enquanto o disjuntor estiver aberto (não vale a pena tentar o Redis)."""
+        if self._open:
+            self._ensure_probe()
+            return False
+        return True
+
+    def record_success(self):
+        if self._failures:
+            with self._lock:
+                self._failures = 0
+
+    def record_failure(self, error):
+        with self._lock:
+            self._failures += 1
+            if self._open or self._failures < self.failure_threshold:
+                return
+            self._open = True
+        print(f"WARN: Redis indisponível ({error}); a usar o SQLite até voltar a responder.")
+        REDIS_CIRCUIT_OPENED.inc()
+        self._ensure_probe()
+
+    # --- Cliente ---
+
+    @property
+    def client(self):
+        """O `redis.Redis` subjacente, criado no primeiro uso."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    pool = redis.ConnectionPool.from_url(
+                        self.url, decode_responses=True,
+                        socket_connect_timeout=self.connect_timeout,
+                        socket_timeout=self.socket_timeout,
+                        max_connections=self.max_connections,
+                        health_check_interval=30,
+                        # Sem novas tentativas internas: uma falha custa no máximo um timeout
+                        retry=Retry(NoBackoff(), 0))
+                    self._client = redis.Redis(connection_pool=pool)
+        return self._client
+
+    def call(self, method, *args, **kwargs):
+        """Executa um comando respeitando o disjuntor."""
+        if not self.available:
+            raise RedisUnavailable('circuit open')
+        try:
+            result = getattr(self.client, method)(*args, **kwargs)
+        except CONNECTION_ERRORS as e:
+            self.record_failure(e)
+            raise
+        self.record_success()
+        return result
+
+    def pipeline(self, transaction=True):
+        if not self.available:
+            raise RedisUnavailable('circuit open')
+        return _GuardedPipeline(self, self.client.pipeline(transaction=transaction))
+
+    def pubsub(self, **kwargs):
+        # Ligação dedicada e longa; o live.TodayBroadcaster trata as falhas
+        if not self.available:
+            raise RedisUnavailable('circuit open')
+        return self.client.pubsub(**kwargs)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        attr = getattr(self.client, name)
+        if not callable(attr):
+            return attr
+        return lambda *args, **kwargs: self.call(name, *args, **kwargs)
+
+    # --- Sonda meio-aberta ---
+
+    def _ensure_probe(self):
+        # Threads não sobrevivem ao fork dos workers do gunicorn: uma por processo
+        if self._probe is not None and self._probe_pid == os.getpid() and self._probe.is_alive():
+            return
+        with self._lock:
+            if not self._open:
+                return
+            if self._probe is not None and self._probe_pid == os.getpid() and self._probe.is_alive():
+                return
+            self._probe_pid = os.getpid()
+            self._probe = threading.Thread(target=self._run_probe, name='redis-probe', daemon=True)
+            self._probe.start()
+
+    def _run_probe(self):
+        delay = self.backoff
+        while True:
+            time.sleep(delay)
+            try:
+                self.client.ping()
+            except Exception:
+                delay = min(delay * 2, self.max_backoff)
+                continue
+            with self._lock:
+                self._open = False
+                self._failures = 0
+                self._probe = None
+            print("Redis voltou a responder.")
+            return
+
+
+class _GuardedPipeline:
+    """Pipeline cujo `execute()` conta para o disjuntor."""
+
+    def __init__(self, owner, pipe):
+        self._owner = owner
+        self._pipe = pipe
+
+    def __len__(self):
+        return len(self._pipe)
+
+    def execute(self, *args, **kwargs):
+        try:
+            result = self._pipe.execute(*args, **kwargs)
+        except CONNECTION_ERRORS as e:
+            self._owner.record_failure(e)
+            raise
+        self._owner.record_success()
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self._pipe, name)
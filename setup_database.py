@@ -1,9 +1,16 @@
+import argparse
+import ast
+import csv
+import json
 import sqlite3
 import os
+import tempfile
+
+import db
 
 # Define o caminho para o ficheiro da base de dados na mesma pasta do script
 project_root = os.path.dirname(os.path.abspath(__file__))
-DATABASE_FILE = os.path.join(project_root, 'eternaldle.db')
+DATABASE_FILE = os.environ.get('ETERNALDLE_DB') or os.path.join(project_root, 'eternaldle.db')
 
 # Lista completa de personagens para popular o jogo
 characters = [
@@ -94,58 +101,237 @@ characters = [
 ('Zahir','Homem','Mago','Longo alcance','Castanho','2019',2,'https://i.imgur.com/j3Kh7O3.png')
 ]
 
-def create_and_populate_db():
-    """Cria o ficheiro da base de dados, define as tabelas e insere os personagens."""
-    # Remove a base de dados antiga para garantir uma instalação limpa se existir
-    if os.path.exists(DATABASE_FILE):
-        print(f"A apagar base de dados antiga: {DATABASE_FILE}")
-        os.remove(DATABASE_FILE)
+# Colunas da tabela eternaldle, pela ordem dos tuplos de `characters`
+COLUMNS = ('NOME', 'GENERO', 'CLASSE', 'ALCANCE', 'COR_CABELO', 'ANO_DE_LANCAMENTO', 'QUANTIDADE_DE_ARMA', 'IMAGEM_URL')
+
+CREATE_CHARACTERS_TABLE = '''
+CREATE TABLE IF NOT EXISTS eternaldle (
+    NOME TEXT PRIMARY KEY,
+    GENERO TEXT,
+    CLASSE TEXT,
+    ALCANCE TEXT,
+    COR_CABELO TEXT,
+    ANO_DE_LANCAMENTO TEXT,
+    QUANTIDADE_DE_ARMA INTEGER,
+    IMAGEM_URL TEXT
+)
+'''
+
+
+# --- Fontes de dados ---
+
+def _normalize_row(values):
+    row = list(values)
+    if len(row) != len(COLUMNS):
+        raise ValueError(f"Linha com {len(row)} colunas (esperadas {len(COLUMNS)}): {values!r}")
+    row = [None if v is None else str(v).strip() for v in row]
+    row[COLUMNS.index('QUANTIDADE_DE_ARMA')] = int(row[COLUMNS.index('QUANTIDADE_DE_ARMA')])
+    return tuple(row)
+
+
+def _rows_from_sql(path):
+    """Lê os tuplos do INSERT de um ficheiro como o EternaldleSQL.sql (um por linha)."""
+    rows = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip().rstrip(',;')
+            if line.startswith('(') and line.endswith(')'):
+                rows.append(ast.literal_eval(line))
+    return rows
+
+
+def _rows_from_json(path):
+    """Lista de objetos com as colunas como chaves, ou lista de listas pela ordem de COLUMNS."""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    return [[item.get(c) for c in COLUMNS] if isinstance(item, dict) else item for item in data]
 
+
+def _rows_from_csv(path):
+    """CSV com cabeçalho com os nomes das colunas."""
+    with open(path, encoding='utf-8', newline='') as f:
+        return [[item.get(c) for c in COLUMNS] for item in csv.DictReader(f)]
+
+
+def load_source(source=None):
+    """Linhas normalizadas da fonte: a lista `characters` (por omissão), .sql, .json ou .csv."""
+    if source is None:
+        raw = characters
+    else:
+        ext = os.path.splitext(source)[1].lower()
+        readers = {'.sql': _rows_from_sql, '.json': _rows_from_json, '.csv': _rows_from_csv}
+        if ext not in readers:
+            raise ValueError(f"Formato de fonte não suportado: {source}")
+        raw = readers[ext](source)
+    rows = [_normalize_row(r) for r in raw]
+    names = [r[0] for r in rows]
+    duplicates = sorted({n for n in names if names.count(n) > 1})
+    if duplicates:
+        raise ValueError(f"Personagens repetidos na fonte: {', '.join(duplicates)}")
+    return rows
+
+
+# --- Sincronização incremental ---
+
+def sync_catalog(path=None, rows=None):
+    """Aplica à tabela existente só as diferenças para `rows`, numa única transação.
+
+    Devolve (inseridos, atualizados, apagados). A versão do catálogo só é
+    incrementada (e o ficheiro de versão reescrito) se houver alterações.
+    """
+    path = path or DATABASE_FILE
+    rows = load_source() if rows is None else rows
+    db.migrate(path)
+    conn = db.connect(path)
+    conn.isolation_level = None
     try:
-        conn = sqlite3.connect(DATABASE_FILE)
-        cursor = conn.cursor()
-
-        # Tabela principal de personagens
-        cursor.execute('''
-        CREATE TABLE eternaldle (
-            NOME TEXT PRIMARY KEY,
-            GENERO TEXT,
-            CLASSE TEXT,
-            ALCANCE TEXT,
-            COR_CABELO TEXT,
-            ANO_DE_LANCAMENTO TEXT,
-            QUANTIDADE_DE_ARMA INTEGER,
-            IMAGEM_URL TEXT
-        )
-        ''')
-
-        # Tabela de estatísticas para contar vencedores diários
-        cursor.execute('''
-        CREATE TABLE daily_stats (
-            data TEXT PRIMARY KEY,
-            winners_count INTEGER DEFAULT 0
-        )
-        ''')
-
-        # Insere a lista completa de personagens
-        cursor.executemany('''
-        INSERT INTO eternaldle (NOME, GENERO, CLASSE, ALCANCE, COR_CABELO, ANO_DE_LANCAMENTO, QUANTIDADE_DE_ARMA, IMAGEM_URL)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', characters)
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(CREATE_CHARACTERS_TABLE)
+            existing = {r[0]: _normalize_row(tuple(r)) for r in conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM eternaldle")}
+            wanted = {r[0]: r for r in rows}
 
-        conn.commit()
+            inserts = [r for name, r in wanted.items() if name not in existing]
+            updates = [r for name, r in wanted.items() if name in existing and existing[name] != r]
+            deletes = [(name,) for name in existing if name not in wanted]
+
+            placeholders = ', '.join('?' * len(COLUMNS))
+            conn.executemany(f"INSERT INTO eternaldle ({', '.join(COLUMNS)}) VALUES ({placeholders})", inserts)
+            assignments = ', '.join(f"{c} = ?" for c in COLUMNS[1:])
+            conn.executemany(f"UPDATE eternaldle SET {assignments} WHERE NOME = ?",
+                             [r[1:] + r[:1] for r in updates])
+            conn.executemany("DELETE FROM eternaldle WHERE NOME = ?", deletes)
+
+            version = None
+            if inserts or updates or deletes:
+                version = db.bump_catalog_version(conn)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+    finally:
         conn.close()
 
-        print(f"Base de dados '{DATABASE_FILE}' criada com sucesso!")
-        print(f"Total de personagens inseridos: {len(characters)}")
+    if version is not None:
+        db.write_catalog_stamp(path, version)
+    return len(inserts), len(updates), len(deletes)
 
-    except sqlite3.Error as e:
-        print(f"Erro ao criar a base de dados: {e}")
+
+# --- Reconstrução do catálogo ---
+
+def _replace_catalog(conn, rows):
+    """Recria a tabela eternaldle com `rows` (dentro da transação atual)."""
+    conn.execute('DROP TABLE IF EXISTS eternaldle')
+    conn.execute(CREATE_CHARACTERS_TABLE)
+    conn.executemany(f"INSERT INTO eternaldle ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})", rows)
+
+
+def rebuild_catalog(path=None, rows=None):
+    """Recria a tabela do catálogo na base de dados existente, numa única transação.
+
+    A escrita é feita no próprio ficheiro (as ligações WAL dos workers
+    continuam válidas) e com o lock de escrita do BEGIN IMMEDIATE, por isso
+    os envios do contador esperam pelo COMMIT em vez de se perderem. As
+    estatísticas não são tocadas.
+    """
+    path = path or DATABASE_FILE
+    rows = load_source() if rows is None else rows
+    db.migrate(path)
+    conn = db.connect(path)
+    conn.isolation_level = None
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            _replace_catalog(conn, rows)
+            version = db.bump_catalog_version(conn)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+    finally:
+        conn.close()
+    db.write_catalog_stamp(path, version)
+    return len(rows)
 
 
+def build_fresh_db(path=None, rows=None):
+    """Constrói a base de dados de raiz e reconstrói o catálogo se ela já existir.
 
+    Sem base de dados, tudo é construído num ficheiro temporário que só é
+    posto no lugar (com um link, que nunca substitui um ficheiro existente)
+    depois de completo. Se a base de dados já existir, nunca é substituída:
+    trocar o ficheiro por baixo de ligações WAL abertas corrompe-o, por isso
+    o catálogo é recriado no próprio ficheiro com `rebuild_catalog`.
+    """
+    path = path or DATABASE_FILE
+    rows = load_source() if rows is None else rows
+    if os.path.exists(path):
+        return rebuild_catalog(path, rows)
 
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix='.eternaldle-', suffix='.db', dir=directory)
+    os.close(fd)
+    # mkstemp cria o ficheiro com 0600; usar as permissões normais (respeitando o umask)
+    umask = os.umask(0)
+    os.umask(umask)
+    os.chmod(tmp, 0o666 & ~umask)
+    try:
+        conn = sqlite3.connect(tmp)
+        _replace_catalog(conn, rows)
+        conn.commit()
+        conn.close()
 
+        # Tabelas de estatísticas / catalog_meta e modo WAL, partilhados com o app.py
+        db.migrate(tmp)
+
+        conn = db.connect(tmp)
+        version = conn.execute("SELECT value FROM catalog_meta WHERE key = 'version'").fetchone()[0]
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        conn.close()
 
+        # Um -wal/-shm sem o ficheiro principal não pertence a esta base de dados
+        for leftover in (path + '-wal', path + '-shm'):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+        try:
+            os.link(tmp, path)
+        except FileExistsError:
+            # Outro processo criou a base de dados entretanto
+            return rebuild_catalog(path, rows)
+    finally:
+        for leftover in (tmp, tmp + '-wal', tmp + '-shm'):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+    db.write_catalog_stamp(path, version)
+    return len(rows)
+
+
+def create_and_populate_db(source=None):
+    """Cria a base de dados se não existir; caso contrário sincroniza o catálogo sem a apagar."""
+    try:
+        rows = load_source(source)
+        if not os.path.exists(DATABASE_FILE):
+            total = build_fresh_db(DATABASE_FILE, rows)
+            print(f"Base de dados '{DATABASE_FILE}' criada com sucesso!")
+            print(f"Total de personagens inseridos: {total}")
+        else:
+            inserted, updated, deleted = sync_catalog(DATABASE_FILE, rows)
+            print(f"Base de dados '{DATABASE_FILE}' sincronizada: "
+                  f"{inserted} inseridos, {updated} atualizados, {deleted} apagados.")
+    except (sqlite3.Error, ValueError, OSError) as e:
+        print(f"Erro ao criar a base de dados: {e}")
 
 
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Cria ou sincroniza a base de dados do Eternaldle.')
+    parser.add_argument('command', nargs='?', choices=['sync', 'rebuild'], default='sync',
+                        help='sync: aplica só as diferenças (cria se não existir); '
+                             'rebuild: recria a tabela do catálogo numa única transação')
+    parser.add_argument('--source', help='ficheiro .sql, .json ou .csv (por omissão, a lista deste script)')
+    args = parser.parse_args()
+    if args.command == 'rebuild':
+        total = build_fresh_db(DATABASE_FILE, load_source(args.source))
+        print(f"Base de dados '{DATABASE_FILE}' reconstruída: {total} personagens.")
+    else:
+        create_and_populate_db(args.source)
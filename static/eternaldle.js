@@ -0,0 +1,356 @@
+document.addEventListener('DOMContentLoaded', () => {
+    const characterInput = document.getElementById('character-input');
+    const characterDatalist = document.getElementById('character-list');
+    const guessForm = document.getElementById('guess-form');
+    const guessButton = document.getElementById('guess-button');
+    const resultsTableBody = document.querySelector('#results-table tbody');
+    const winnersInfo = document.getElementById('winners-info');
+    // Mensagem de vitória, mostrada no lugar do formulário
+    const winMessageContainer = document.createElement('div');
+    winMessageContainer.id = 'win-message';
+    winMessageContainer.className = 'hidden';
+    guessForm.after(winMessageContainer);
+    
+    let characterNames = [];
+    let guessedNames = new Set();
+    let isGameOver = false;
+
+    // LocalStorage helpers to persist guesses per-solution (by date)
+    const todayKey = () => `eternaldle_guesses_${new Date().toISOString().slice(0,10)}`;
+    const wonKey = () => `eternaldle_won_${new Date().toISOString().slice(0,10)}`;
+
+    function loadLocalGuesses() {
+        try {
+            const raw = localStorage.getItem(todayKey());
+            return raw ? JSON.parse(raw) : [];
+        } catch (e) { return []; }
+    }
+    function saveLocalGuesses(guesses) {
+        try { localStorage.setItem(todayKey(), JSON.stringify(guesses)); } catch (e) { /* ignore */ }
+    }
+    function setLocalWon(flag) {
+        try { localStorage.setItem(wonKey(), flag ? '1' : ''); } catch (e) {}
+    }
+    function getLocalWon() {
+        try { return !!localStorage.getItem(wonKey()); } catch (e) { return false; }
+    }
+
+    // Remove um personagem chutado da lista de sugestões (e atualiza a datalist)
+    function removeCharacterFromList(name) {
+        try {
+            const l = (name || '').trim().toLowerCase();
+            if (!l) return;
+            // marca como chutado para impedir reaparecer mesmo digitando manualmente
+            guessedNames.add(l);
+            characterNames = characterNames.filter(n => n.toLowerCase() !== l);
+            const val = characterInput.value.trim();
+            if (val.length >= 2) {
+                updateSuggestions(val);
+            } else {
+                characterDatalist.innerHTML = '';
+            }
+        } catch (e) {
+            console.error('Erro removendo personagem da lista', e);
+        }
+    }
+
+    // --- Compartilhamento para Discord --- 🔧
+    function getShareText() {
+        try {
+            const guesses = loadLocalGuesses();
+            if (!guesses || guesses.length === 0) return `Eternaldle — sem chutes registrados hoje.`;
+
+            const order = ['nome','genero','classe','alcance','cor_cabelo','ano_de_lancamento','quantidade_de_arma'];
+            const statusToEmoji = (status) => {
+                if (status === 'correct') return '🟩';
+                if (status === 'partial' || status === 'higher' || status === 'lower') return '🟨';
+                return '🟥';
+            };
+
+            const rows = guesses.map(g => {
+                const res = g.results || {};
+                return order.map(k => {
+                    const s = res[k] && res[k].status ? res[k].status : 'incorrect';
+                    return statusToEmoji(s);
+                }).join('');
+            }).join('\n');
+
+            const attempts = guesses.length;
+            return `Eternaldle — Acertou em ${attempts} tentativa${attempts === 1 ? '' : 's'}\n\n${rows}\n\n(atributos: nome, gênero, classe, alcance, cabelo, lançamento, armas)\nJogue: ${location.origin}${location.pathname}`;
+        } catch (e) {
+            console.error('Erro ao gerar texto para compartilhamento', e);
+            return 'Eternaldle';
+        }
+    }
+
+    function createShareButton() {
+        const btn = document.createElement('button');
+        btn.id = 'shareDiscordButton';
+        btn.type = 'button';
+        btn.className = 'mt-4 bg-[#5865F2] hover:bg-[#4b54d6] text-white font-bold py-2 px-4 rounded-md transition-colors';
+        btn.textContent = 'Compartilhar';
+
+        btn.addEventListener('click', async () => {
+            const text = getShareText();
+            try {
+                if (navigator.clipboard && navigator.clipboard.writeText) {
+                    await navigator.clipboard.writeText(text);
+                } else {
+                    const ta = document.createElement('textarea');
+                    ta.value = text;
+                    document.body.appendChild(ta);
+                    ta.select();
+                    document.execCommand('copy');
+                    document.body.removeChild(ta);
+                }
+                showToast('Resultado copiado! Cole no Discord ou onde quiser. ✅');
+            } catch (err) {
+                console.error('Falha ao copiar para a área de transferência', err);
+                showToast('Não foi possível copiar automaticamente. Copie manualmente.', true);
+            }
+        });
+
+        return btn;
+    }
+
+    function showWinMessage(countText = '') {
+        winMessageContainer.innerHTML = `<h2 class="text-3xl font-bold text-green-400 win-message">Parabéns! Você acertou!</h2>${countText}`;
+        // remove wrap existente se houver
+        const existing = document.getElementById('shareWrap');
+        if (existing) existing.remove();
+        // adiciona botão de compartilhar
+        const shareWrap = document.createElement('div');
+        shareWrap.id = 'shareWrap';
+        shareWrap.className = 'flex flex-col items-center';
+        shareWrap.appendChild(createShareButton());
+        const small = document.createElement('p');
+        small.className = 'mt-2 text-gray-300 text-sm text-center';
+        small.textContent = 'Clique em "Compartilhar" para copiar o resumo (🟩=correto, 🟨=parcial/maior/menor, 🟥=incorreto) — um quadrado por atributo: nome, gênero, classe, alcance, cabelo, lançamento, armas.';
+        shareWrap.appendChild(small);
+        winMessageContainer.appendChild(shareWrap);
+        winMessageContainer.classList.remove('hidden');
+    }
+
+    async function startGame() {
+        try {
+            const response = await fetch('/api/start_game', { method: 'POST', credentials: 'include' });
+            const data = await response.json();
+            
+            if (data.error) throw new Error(data.error);
+
+            // Lista de nomes estática: GET com a versão do catálogo no URL fica em cache no browser
+            const namesResponse = await fetch(`/api/characters?v=${encodeURIComponent(data.catalogVersion)}`);
+            const namesData = await namesResponse.json();
+            if (namesData.error) throw new Error(namesData.error);
+            characterNames = namesData.characterNames.map(name => name.trim());
+            // Do not populate the datalist immediately — populate when user types >=2 chars
+            characterDatalist.innerHTML = '';
+            if (typeof data.todayCorrectCount !== 'undefined') updateWinnersUI(data.todayCorrectCount);
+
+            // Restore persisted guesses for this session/day
+            let localGuesses = loadLocalGuesses();
+            if (localGuesses && localGuesses.length > 0) {
+                // Revalida todos os palpites locais num único pedido (em vez de um /api/guess por nome)
+                try {
+                    const batchResponse = await fetch('/api/guesses:batch', {
+                        method: 'POST',
+                        headers: { 'Content-Type': 'application/json' },
+                        body: JSON.stringify({ guesses: localGuesses.map(g => g.guess) }),
+                        credentials: 'include'
+                    });
+                    const batch = await batchResponse.json();
+                    if (!batch.error) {
+                        localGuesses = batch.results.filter(g => !g.error);
+                        saveLocalGuesses(localGuesses);
+                    }
+                } catch (e) { console.error('Could not revalidate local guesses', e); }
+                localGuesses.forEach(g => {
+                    try { renderRow(g.results); } catch (e) { console.error('Failed to render a local previous guess', e); }
+                    if (g && g.guess) removeCharacterFromList(g.guess);
+                });
+            } else if (data.previousGuesses && data.previousGuesses.length > 0) {
+                // If server has session guesses but local doesn't, adopt server-side guesses into local
+                data.previousGuesses.forEach(g => {
+                    try { renderRow(g.results); } catch (e) { console.error('Failed to render a previous guess', e); }
+                    if (g && g.guess) removeCharacterFromList(g.guess);
+                });
+                try { saveLocalGuesses(data.previousGuesses); } catch (e) {}
+            }
+
+            // If the session already won for today, show win state
+            const localWon = getLocalWon();
+            if (data.hasWon || localWon) {
+                isGameOver = true;
+                guessForm.classList.add('hidden');
+                let countText = '';
+                if (typeof data.todayCorrectCount !== 'undefined') {
+                    const n = data.todayCorrectCount;
+                    countText = `<p class="mt-2 text-gray-300">${n} ${n === 1 ? 'pessoa acertou' : 'pessoas acertaram'} o personagem de hoje.</p>`;
+                }
+                showWinMessage(countText);
+            }
+
+        } catch (error) {
+            showToast(error.message, true);
+        }
+    }
+
+    function updateWinnersUI(count) {
+        winnersInfo.textContent = `${count} ${count === 1 ? 'pessoa acertou' : 'pessoas acertaram'} o personagem de hoje.`;
+    }
+
+    document.getElementById('guess-form').addEventListener('submit', async (e) => {
+        e.preventDefault();
+        const guess = characterInput.value.trim();
+        if (isGameOver || !guess) return;
+
+        // Impede palpites duplicados
+        const existingGuesses = loadLocalGuesses();
+        if (existingGuesses && existingGuesses.some(g => g.guess && g.guess.toLowerCase() === guess.toLowerCase())) {
+            showToast('Você já chutou esse personagem', true);
+            return;
+        }
+
+        try {
+            const response = await fetch('/api/guess', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ guess }),
+                credentials: 'include'
+            });
+            const data = await response.json();
+            
+            if (data.error) throw new Error(data.error);
+            // O servidor devolve o nome canónico ("li dailin" -> "Li Dailin")
+            const name = data.guess || guess;
+
+            renderRow(data.results);
+
+            if (data.isCorrect) {
+                isGameOver = true;
+                guessForm.classList.add('hidden');
+                let countText = '';
+                if (typeof data.todayCorrectCount !== 'undefined') {
+                    const n = data.todayCorrectCount;
+                    updateWinnersUI(n);
+                    countText = `<p class="mt-2 text-gray-300">${n} ${n === 1 ? 'pessoa acertou' : 'pessoas acertaram'} o personagem de hoje.</p>`;
+                }
+                showWinMessage(countText);
+                showToast('Você venceu!', false);
+                // Mark local won flag
+                setLocalWon(true);
+            }
+
+            // Persist this guess locally so it survives F5 (avoid duplicates)
+            try {
+                const lsKey = todayKey();
+                const existing = loadLocalGuesses();
+                const entry = { guess: name, results: data.results, isCorrect: data.isCorrect };
+                if (!existing.some(g => g.guess.toLowerCase() === name.toLowerCase())) {
+                    existing.push(entry);
+                    saveLocalGuesses(existing);
+                }
+                // Remove the guessed name so the user cannot chutar de novo
+                removeCharacterFromList(name);
+            } catch (e) { console.error('Could not persist guess locally', e); }
+
+            characterInput.value = '';
+            characterDatalist.innerHTML = ''; // Limpa a lista após o envio
+        } catch (error) {
+            showToast(error.message, true);
+        }
+    });
+
+    function renderRow(res) {
+        const row = document.createElement('tr');
+        row.className = 'result-row';
+        
+        const cols = ['imagem_url', 'nome', 'genero', 'classe', 'alcance', 'cor_cabelo', 'ano_de_lancamento', 'quantidade_de_arma'];
+        
+        cols.forEach(key => {
+            const cell = document.createElement('td');
+            const item = res[key];
+            
+            if (key === 'imagem_url') {
+                const img = document.createElement('img');
+                img.src = item.value;
+                img.className = 'character-image';
+                img.alt = "[Imagem do Personagem]";
+                cell.appendChild(img);
+                cell.className = res.nome.status;
+            } else if (key === 'ano_de_lancamento' || key === 'quantidade_de_arma') {
+                cell.className = item.status;
+                const arrow = item.status === 'higher' ? '⬆' : (item.status === 'lower' ? '⬇' : '');
+                cell.innerHTML = `<div class="numeric-cell">${item.value} ${arrow}</div>`;
+            } else {
+                cell.className = item.status;
+                cell.textContent = String(item.value).replace(/,/g, ', ');
+            }
+            row.appendChild(cell);
+        });
+        resultsTableBody.prepend(row);
+    }
+
+    function showToast(msg, isError = false) {
+        const t = document.createElement('div');
+        t.className = `toast ${isError ? 'error' : ''}`;
+        t.textContent = msg;
+        document.getElementById('toast-container').appendChild(t);
+        setTimeout(() => {
+            t.style.opacity = '0';
+            setTimeout(() => t.remove(), 500);
+        }, 3000);
+    }
+
+    startGame();
+    // Update datalist only after user types 2+ characters and prevent guessing already-chutados
+    characterInput.addEventListener('input', () => {
+        const val = characterInput.value.trim();
+        const valLower = val.toLowerCase();
+        const warning = document.getElementById('input-warning');
+
+        if (val && guessedNames.has(valLower)) {
+            // bloqueia envio e mostra aviso
+            guessButton.disabled = true;
+            guessButton.classList.add('opacity-50', 'cursor-not-allowed');
+            warning.classList.remove('hidden');
+            warning.textContent = 'Você já chutou esse personagem.';
+            characterDatalist.innerHTML = '';
+            return;
+        } else {
+            guessButton.disabled = false;
+            guessButton.classList.remove('opacity-50', 'cursor-not-allowed');
+            warning.classList.add('hidden');
+        }
+
+        if (val.length >= 2) {
+            updateSuggestions(val);
+        } else {
+            characterDatalist.innerHTML = '';
+        }
+    });
+
+    // Sugestões vindas de /api/suggest (ignora acentos/maiúsculas e os nomes já chutados)
+    let suggestController = null;
+    async function updateSuggestions(q) {
+        if (suggestController) suggestController.abort();
+        suggestController = new AbortController();
+        try {
+            const params = new URLSearchParams({ q, limit: '10', exclude_guessed: '1' });
+            const res = await fetch(`/api/suggest?${params}`, { credentials: 'include', signal: suggestController.signal });
+            if (!res.ok) return;
+            const data = await res.json();
+            const matches = (data.suggestions || []).filter(n => !guessedNames.has(n.toLowerCase()));
+            characterDatalist.innerHTML = matches.map(name => `<option value="${name}"></option>`).join('');
+        } catch (e) {
+            if (e.name !== 'AbortError') console.error('Falha ao obter sugestões', e);
+        }
+    }
+    // O Enter submete o formulário (tratado no listener de submit); com o botão desativado só avisa
+    characterInput.addEventListener('keydown', (e) => {
+        if (e.key === 'Enter' && guessButton.disabled) {
+            e.preventDefault();
+            showToast('Você já chutou esse personagem', true);
+        }
+    });
+});
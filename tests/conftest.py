@@ -0,0 +1,31 @@
+"""Configuração dos testes: base de dados temporária e sem Redis.
+
+O ETERNALDLE_DB é definido antes de importar qualquer módulo do projeto: o
+db.py (e com ele o app.py e o catalog.py) lê o caminho ao ser importado.
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+_directory = tempfile.mkdtemp(prefix='eternaldle-tests-')
+DATABASE_FILE = os.path.join(_directory, 'eternaldle.db')
+os.environ['ETERNALDLE_DB'] = DATABASE_FILE
+os.environ.pop('REDIS_URL', None)
+os.environ.pop('UPSTASH_REDIS_URL', None)
+os.environ['MIGRATE_TOKEN'] = 'test-token'
+
+import setup_database  # noqa: E402
+
+setup_database.create_and_populate_db()
+
+
+def pytest_unconfigure(config):
+    # Enviar os acertos pendentes antes de apagar a base de dados
+    if 'app' in sys.modules:
+        sys.modules['app'].win_counter.flush()
+    shutil.rmtree(_directory, ignore_errors=True)
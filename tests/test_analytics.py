@@ -0,0 +1,35 @@
+"""Relatório de analytics.py exposto em /admin/analytics."""
+import pytest
+
+import app as wsgi
+from catalog import get_catalog
+
+pytest.importorskip('numpy')
+
+AUTH = {'Authorization': 'Bearer test-token'}
+
+
+def get(query='', headers=None):
+    return wsgi.app.test_client(use_cookies=False).get('/admin/analytics', query_string=query,
+                                                        headers=headers or {})
+
+
+@pytest.mark.parametrize('headers', [None, {'Authorization': 'Bearer wrong'}])
+def test_requires_token(headers):
+    assert get(headers=headers).status_code == 403
+
+
+def test_report_for_current_catalog():
+    reply = get('top=3&days=5', AUTH)
+    assert reply.status_code == 200
+    report = reply.get_json()
+    catalog = get_catalog()
+    assert report['catalogVersion'] == catalog.version
+    assert report['characters'] == len(catalog.names)
+    assert len(report['topFirstGuesses']) == 3
+    assert len(report['schedule']) == 5
+
+
+@pytest.mark.parametrize('query', ['top=-1', 'days=100000'])
+def test_rejects_bad_parameters(query):
+    assert get(query, AUTH).status_code == 400
@@ -0,0 +1,229 @@
+"""Compatibilidade entre a app Flask (app.py) e a entrada ASGI (asgi.py).
+
+Os mesmos pedidos passam pelos dois modos; o status, o corpo, os cabeçalhos
+relevantes e o cookie de sessão têm de ser iguais, e um cookie emitido por
+um modo tem de servir no outro.
+"""
+import asyncio
+import json
+
+import pytest
+from werkzeug.http import parse_cookie
+
+import app as wsgi
+import asgi
+import game_state
+import live
+from catalog import day_number, get_catalog
+
+COOKIE_NAME = wsgi.app.config['SESSION_COOKIE_NAME']
+
+
+class Reply:
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def header(self, name):
+        values = [v for k, v in self.headers if k.lower() == name.lower()]
+        return ', '.join(values) if values else None
+
+    @property
+    def cookie(self):
+        """Valor do cookie de sessão emitido (None se não houver Set-Cookie)."""
+        for name, value in self.headers:
+            if name.lower() == 'set-cookie':
+                return parse_cookie(value.split(';', 1)[0]).get(COOKIE_NAME)
+        return None
+
+    @property
+    def session(self):
+        return asgi.session_serializer.loads(self.cookie) if self.cookie else None
+
+    def json(self):
+        return json.loads(self.body)
+
+
+def call_wsgi(method, path, body=b'', headers=None, query=''):
+    client = wsgi.app.test_client(use_cookies=False)
+    # Servidor com threads (como o gunicorn gthread e a ponte WSGI do asgi.py)
+    response = client.open(path, method=method, data=body, headers=headers or {}, query_string=query,
+                           environ_overrides={'wsgi.multithread': True})
+    return Reply(response.status_code, list(response.headers.items()), response.get_data())
+
+
+def call_asgi(method, path, body=b'', headers=None, query=''):
+    async def run():
+        messages = []
+        finished = asyncio.Event()
+        delivered = False
+
+        async def receive():
+            nonlocal delivered
+            if not delivered:
+                delivered = True
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            await finished.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            messages.append(message)
+            if message['type'] == 'http.response.body' and not message.get('more_body'):
+                finished.set()
+
+        scope = {
+            'type': 'http', 'method': method, 'path': path, 'root_path': '', 'scheme': 'http',
+            'query_string': query.encode('latin-1'), 'http_version': '1.1',
+            'server': ('localhost', 80), 'client': ('127.0.0.1', 1234),
+            'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in (headers or {}).items()],
+        }
+        await asgi.app(scope, receive, send)
+        return messages
+
+    messages = asyncio.run(run())
+    start = messages[0]
+    headers = [(k.decode('latin-1'), v.decode('latin-1')) for k, v in start['headers']]
+    body = b''.join(m.get('body', b'') for m in messages[1:])
+    return Reply(start['status'], headers, body)
+
+
+MODES = {'wsgi': call_wsgi, 'asgi': call_asgi}
+
+
+def both(method, path, body=b'', headers=None, query=''):
+    return {mode: call(method, path, body, headers, query) for mode, call in MODES.items()}
+
+
+def json_body(data):
+    return json.dumps(data).encode('utf-8'), {'Content-Type': 'application/json'}
+
+
+def with_cookie(headers, cookie):
+    headers = dict(headers or {})
+    headers['Cookie'] = f"{COOKIE_NAME}={cookie}"
+    return headers
+
+
+def assert_same(replies, compare_body=True):
+    wsgi_reply, asgi_reply = replies['wsgi'], replies['asgi']
+    assert asgi_reply.status == wsgi_reply.status
+    for name in ('Content-Type', 'Vary', 'Access-Control-Allow-Origin'):
+        assert asgi_reply.header(name) == wsgi_reply.header(name), name
+    if compare_body:
+        assert asgi_reply.body == wsgi_reply.body
+    assert asgi_reply.session == wsgi_reply.session
+
+
+@pytest.fixture
+def started_cookie():
+    """Cookie de uma sessão com o jogo de hoje iniciado (emitido pela app Flask)."""
+    return call_wsgi('POST', '/api/start_game').cookie
+
+
+def solution_and_other(cookie):
+    catalog = get_catalog()
+    session = asgi.session_serializer.loads(cookie)
+    solution_idx = game_state.solution_index(session, catalog)
+    other_idx = (solution_idx + 1) % len(catalog)
+    return catalog.names[solution_idx], catalog.names[other_idx]
+
+
+def test_start_game_without_cookie():
+    replies = both('POST', '/api/start_game', headers={'Origin': 'http://example.com'})
+    assert_same(replies)
+    assert replies['asgi'].json()['previousGuesses'] == []
+    assert replies['asgi'].session['day'] == day_number()
+
+
+@pytest.mark.parametrize('origin', ['wsgi', 'asgi'])
+def test_session_cookie_is_interchangeable(origin):
+    cookie = MODES[origin]('POST', '/api/start_game').cookie
+    _, wrong = solution_and_other(cookie)
+    body, headers = json_body({'guess': wrong})
+    replies = both('POST', '/api/guess', body, with_cookie(headers, cookie))
+    assert_same(replies)
+    assert replies['wsgi'].json()['isCorrect'] is False
+
+    # O cookie de cada modo é aceite pelo outro e mantém o palpite
+    for mode, reply in replies.items():
+        other = 'asgi' if mode == 'wsgi' else 'wsgi'
+        resumed = MODES[other]('POST', '/api/start_game', headers=with_cookie({}, reply.cookie))
+        assert resumed.status == 200
+        assert [g['guess'] for g in resumed.json()['previousGuesses']] == [wrong]
+
+
+def test_guess_accepts_normalized_names(started_cookie):
+    _, wrong = solution_and_other(started_cookie)
+    body, headers = json_body({'guess': f"  {wrong.upper()} "})
+    assert_same(both('POST', '/api/guess', body, with_cookie(headers, started_cookie)))
+
+
+def test_correct_guess_counts_one_win_per_mode(started_cookie):
+    solution, _ = solution_and_other(started_cookie)
+    body, headers = json_body({'guess': solution})
+    replies = both('POST', '/api/guess', body, with_cookie(headers, started_cookie))
+    # Cada modo conta a sua vitória (mesma sessão de partida), por isso só a contagem difere
+    assert_same(replies, compare_body=False)
+    first, second = replies['wsgi'].json(), replies['asgi'].json()
+    assert first['isCorrect'] is second['isCorrect'] is True
+    assert second['todayCorrectCount'] == first['todayCorrectCount'] + 1
+    assert {k: v for k, v in first.items() if k != 'todayCorrectCount'} == \
+        {k: v for k, v in second.items() if k != 'todayCorrectCount'}
+
+    # Uma sessão que já ganhou não volta a contar em nenhum dos modos
+    won_cookie = replies['asgi'].cookie
+    again = both('POST', '/api/guess', body, with_cookie(headers, won_cookie))
+    assert_same(again)
+    assert again['wsgi'].json()['todayCorrectCount'] == second['todayCorrectCount']
+
+
+@pytest.mark.parametrize('body, content_type', [
+    (b'{"guess": "Ninguem"}', 'application/json'),  # 404
+    (b'{}', 'application/json'),  # 404 (nome vazio)
+    (b'["Abigail"]', 'application/json'),  # 500 (não é um objeto)
+    (b'{"guess": 5}', 'application/json'),  # 500 (não é texto)
+    (b'null', 'application/json'),  # 500
+    (b'{"guess": ', 'application/json'),  # 400 (JSON inválido)
+    (b'', 'application/json'),  # 400
+    (b'guess=Abigail', 'application/x-www-form-urlencoded'),  # 415
+    (b'{"guess": "Abigail"}', None),  # 415 (sem Content-Type)
+])
+def test_guess_errors_match(started_cookie, body, content_type):
+    headers = {'Content-Type': content_type} if content_type else {}
+    assert_same(both('POST', '/api/guess', body, with_cookie(headers, started_cookie)))
+
+
+def test_guess_without_game():
+    body, headers = json_body({'guess': 'Abigail'})
+    assert_same(both('POST', '/api/guess', body, headers))
+
+
+def test_invalid_cookie_starts_new_session():
+    replies = both('POST', '/api/start_game', headers=with_cookie({}, 'not-a-valid-cookie'))
+    assert_same(replies)
+    assert replies['asgi'].session['guesses'] == []
+
+
+@pytest.mark.parametrize('authorization', [None, 'Bearer wrong', 'Bearer test-token'])
+def test_migrate_counts_matches(authorization):
+    # Sem Redis: 403 sem token válido, 400 com token
+    headers = {'Authorization': authorization} if authorization else {}
+    replies = both('POST', '/admin/migrate_counts', headers=headers, query='direction=to-sqlite')
+    assert_same(replies)
+
+
+def test_forwarded_routes_match():
+    assert_same(both('GET', '/api/characters'))
+
+
+def test_stream_today_matches(monkeypatch):
+    monkeypatch.setattr(live, 'MAX_STREAM_SECONDS', 0.2)
+    monkeypatch.setattr(live, 'HEARTBEAT_INTERVAL', 0.05)
+    replies = both('GET', '/api/stream/today', headers={'Origin': 'http://example.com'})
+    assert_same(replies, compare_body=False)
+    for reply in replies.values():
+        events = reply.body.decode('utf-8').split('\n\n')
+        assert events[0] == live.RETRY_EVENT.strip()
+        assert events[1].startswith('event: todayCorrectCount\ndata: ')
+    assert wsgi.today_broadcaster.clients == 0
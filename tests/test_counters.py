@@ -0,0 +1,40 @@
+"""Leituras do counters.WinCounter enquanto a thread de envio corre."""
+import threading
+import time
+
+import counters
+import db
+
+
+def test_readings_never_go_backwards(monkeypatch):
+    monkeypatch.setattr(counters, 'FLUSH_INTERVAL', 0.01)
+    monkeypatch.setattr(counters, 'CACHE_TTL', 0.005)
+    counter = counters.WinCounter(None, db.DATABASE_FILE)
+    flush_sqlite = counter._flush_sqlite
+
+    def slow_flush(batch):
+        # Alarga a janela entre o envio e a gravação dos novos totais na cache
+        totals = flush_sqlite(batch)
+        time.sleep(0.002)
+        return totals
+
+    counter._flush_sqlite = slow_flush
+    day = '2000-01-01'
+    decreases = []
+
+    def player():
+        last = -1
+        for _ in range(500):
+            for value in (counter.increment('Abigail', day), counter.get(day)):
+                if value < last:
+                    decreases.append((last, value))
+                last = value
+
+    threads = [threading.Thread(target=player) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert counter.flush()
+    assert decreases == []
+    assert counter.get(day) == 8 * 500
@@ -0,0 +1,100 @@
+"""Teste diferencial da matriz de feedback contra o ciclo original do /api/guess."""
+import pytest
+
+from catalog import get_catalog
+from feedback import FeedbackMatrix, compare_characters
+
+
+def reference_results(guess_character, solution):
+    """Ciclo de comparação original do handle_guess (antes da matriz), mantido como oráculo."""
+    results = {}
+    for key in solution.keys():
+        if key in ['IMAGEM_URL']: continue
+
+        guess_value = guess_character.get(key)
+        solution_value = solution.get(key)
+        status = 'incorrect'
+
+        if str(guess_value).lower() == str(solution_value).lower():
+            status = 'correct'
+        elif key in ['ANO_DE_LANCAMENTO', 'QUANTIDADE_DE_ARMA']:
+            try:
+                if int(guess_value) < int(solution_value): status = 'higher'
+                elif int(guess_value) > int(solution_value): status = 'lower'
+            except: status = 'incorrect'  # noqa: E722
+        elif key in ['CLASSE', 'ALCANCE']:
+            guess_parts = {part.strip().lower() for part in str(guess_value).split(',')}
+            solution_parts = {part.strip().lower() for part in str(solution_value).split(',')}
+            if guess_parts.intersection(solution_parts): status = 'partial'
+
+        results[key.lower()] = {'value': guess_value, 'status': status}
+
+    results['imagem_url'] = {'value': guess_character['IMAGEM_URL']}
+    return results
+
+
+def character(name, classe='Lutador', alcance='Corpo-a-corpo', ano='2021', armas=1, **extra):
+    record = {
+        'NOME': name, 'GENERO': 'Mulher', 'CLASSE': classe, 'ALCANCE': alcance,
+        'COR_CABELO': 'Preto', 'ANO_DE_LANCAMENTO': ano, 'QUANTIDADE_DE_ARMA': armas,
+        'IMAGEM_URL': f'https://example.com/{name}.png',
+    }
+    record.update(extra)
+    return record
+
+
+EDGE_RECORDS = [
+    character('Base'),
+    # ANO_DE_LANCAMENTO não numérico (e o mesmo texto com outra capitalização)
+    character('SemAno', ano='Desconhecido'),
+    character('SemAnoMinusculas', ano='desconhecido'),
+    character('AnoVazio', ano=''),
+    character('AnoNulo', ano=None),
+    # Inteiros iguais com texto diferente
+    character('AnoZeroEsquerda', ano='02021'),
+    character('ArmasTexto', armas='01'),
+    character('AnoEspaco', ano=' 2021'),
+    # CLASSE/ALCANCE com vários valores que se sobrepõem
+    character('MagoSuporte', classe='Mago,Suporte', alcance='Corpo-a-corpo,Longo alcance'),
+    character('SuporteMago', classe='suporte, mago', alcance='Longo alcance'),
+    character('SuporteTank', classe='Suporte,Tank', alcance='Longo Alcance, Corpo-a-corpo'),
+    character('Tank', classe='Tank'),
+    character('ClasseVazia', classe=''),
+    # Valores de outros atributos com capitalização diferente
+    character('Capitalizado', GENERO='MULHER', COR_CABELO='preto'),
+]
+
+
+def assert_all_pairs_match(records):
+    matrix = FeedbackMatrix(records)
+    for g, guess in enumerate(records):
+        for s, solution in enumerate(records):
+            expected = reference_results(guess, solution)
+            assert matrix.results(g, s) == expected, (guess['NOME'], solution['NOME'])
+            assert compare_characters(guess, solution) == expected, (guess['NOME'], solution['NOME'])
+
+
+def test_catalog_matches_reference():
+    catalog = get_catalog()
+    assert len(catalog.records) > 1
+    assert_all_pairs_match(catalog.records)
+
+
+def test_edge_rows_match_reference():
+    assert_all_pairs_match(EDGE_RECORDS)
+
+
+@pytest.mark.parametrize('guess, solution, key, status', [
+    ('SemAno', 'Base', 'ano_de_lancamento', 'incorrect'),
+    ('SemAno', 'SemAnoMinusculas', 'ano_de_lancamento', 'correct'),
+    ('AnoZeroEsquerda', 'Base', 'ano_de_lancamento', 'incorrect'),
+    ('ArmasTexto', 'Base', 'quantidade_de_arma', 'incorrect'),
+    ('MagoSuporte', 'SuporteMago', 'classe', 'partial'),
+    ('MagoSuporte', 'SuporteTank', 'alcance', 'partial'),
+    ('SuporteTank', 'Tank', 'classe', 'partial'),
+    ('MagoSuporte', 'Tank', 'classe', 'incorrect'),
+])
+def test_edge_statuses(guess, solution, key, status):
+    names = [r['NOME'] for r in EDGE_RECORDS]
+    matrix = FeedbackMatrix(EDGE_RECORDS)
+    assert matrix.results(names.index(guess), names.index(solution))[key]['status'] == status
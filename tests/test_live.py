@@ -0,0 +1,41 @@
+"""Lugares de clientes do /api/stream/today (live.TodayBroadcaster)."""
+import app as wsgi
+import live
+
+THREADED = {'wsgi.multithread': True}
+
+
+def test_head_requests_release_their_slot():
+    client = wsgi.app.test_client()
+    before = wsgi.today_broadcaster.clients
+    for _ in range(5):
+        response = client.head('/api/stream/today', environ_overrides=THREADED)
+        assert response.status_code == 200
+        response.close()
+    assert wsgi.today_broadcaster.clients == before
+
+
+def test_finished_stream_releases_its_slot(monkeypatch):
+    monkeypatch.setattr(live, 'MAX_STREAM_SECONDS', 0.05)
+    monkeypatch.setattr(live, 'HEARTBEAT_INTERVAL', 0.01)
+    before = wsgi.today_broadcaster.clients
+    response = wsgi.app.test_client().get('/api/stream/today', environ_overrides=THREADED)
+    assert response.get_data(as_text=True).startswith(live.RETRY_EVENT)
+    response.close()
+    assert wsgi.today_broadcaster.clients == before
+
+
+def test_unstarted_stream_close_is_idempotent():
+    broadcaster = live.TodayBroadcaster(lambda: 0)
+    events = broadcaster.stream()
+    assert broadcaster.clients == 1
+    events.close()
+    events.close()
+    assert broadcaster.clients == 0
+
+
+def test_sync_worker_refuses_stream():
+    before = wsgi.today_broadcaster.clients
+    response = wsgi.app.test_client().get('/api/stream/today', environ_overrides={'wsgi.multithread': False})
+    assert response.status_code == 503
+    assert wsgi.today_broadcaster.clients == before
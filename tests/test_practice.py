@@ -0,0 +1,43 @@
+"""Modo de treino: tokens assinados e validação dos pedidos."""
+import pytest
+
+import app as wsgi
+import practice
+from catalog import get_catalog
+
+SECRET = wsgi.app.config['SECRET_KEY']
+
+
+def start_round(client):
+    return client.post('/api/practice/start').get_json()['token']
+
+
+def test_round_trip():
+    client = wsgi.app.test_client()
+    token = start_round(client)
+    solution = client.post('/api/practice/reveal', json={'token': token}).get_json()['solution']
+    reply = client.post('/api/practice/guess', json={'token': token, 'guess': solution}).get_json()
+    assert reply['isCorrect'] is True
+
+
+@pytest.mark.parametrize('token', ['1.abc.é', '1.abc.\U0001F600', 'é', '', None, 5, '1..x', 'zz.abc.AAAA'])
+def test_invalid_tokens_are_rejected(token):
+    reply = wsgi.app.test_client().post('/api/practice/guess', json={'token': token, 'guess': 'Abigail'})
+    assert reply.status_code == 400
+    assert practice.read_token(SECRET, token) is None
+
+
+@pytest.mark.parametrize('path', ['/api/practice/guess', '/api/practice/reveal'])
+@pytest.mark.parametrize('body', [['x'], 'token', 5, None])
+def test_non_object_bodies_are_rejected(path, body):
+    assert wsgi.app.test_client().post(path, json=body).status_code == 400
+
+
+def test_solution_is_keyed_by_the_secret():
+    catalog = get_catalog()
+    seeds = range(200)
+    keyed = [practice.solution_index(SECRET, catalog, seed) for seed in seeds]
+    # O seed sozinho (em claro no token) não dá a solução
+    assert keyed != [seed % len(catalog) for seed in seeds]
+    assert keyed != [practice.solution_index('outra chave', catalog, seed) for seed in seeds]
+    assert all(0 <= index < len(catalog) for index in keyed)
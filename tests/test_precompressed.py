@@ -0,0 +1,39 @@
+"""ETags por codificação nas respostas pré-comprimidas (/api/characters e a página)."""
+import pytest
+
+import app as wsgi
+
+
+def get(path, **headers):
+    return wsgi.app.test_client(use_cookies=False).get(path, headers=headers)
+
+
+@pytest.mark.parametrize('path', ['/api/characters', '/'])
+def test_each_encoding_has_its_own_etag(path):
+    plain = get(path)
+    gzipped = get(path, **{'Accept-Encoding': 'gzip'})
+    assert gzipped.headers['Content-Encoding'] == 'gzip'
+    assert gzipped.get_data() != plain.get_data()
+    assert gzipped.headers['ETag'] != plain.headers['ETag']
+
+    # Cada variante revalida com o seu ETag
+    for reply, accept in ((plain, 'identity'), (gzipped, 'gzip')):
+        again = get(path, **{'Accept-Encoding': accept, 'If-None-Match': reply.headers['ETag']})
+        assert again.status_code == 304
+        assert again.headers['ETag'] == reply.headers['ETag']
+
+
+def test_not_modified_names_the_stored_variant():
+    plain = get('/api/characters')
+    gzipped = get('/api/characters', **{'Accept-Encoding': 'gzip'})
+    # Uma cache com as duas variantes envia os dois ETags; o 304 aponta a que seria enviada
+    both_tags = f"{plain.headers['ETag']}, {gzipped.headers['ETag']}"
+    again = get('/api/characters', **{'Accept-Encoding': 'gzip', 'If-None-Match': both_tags})
+    assert again.status_code == 304
+    assert again.headers['ETag'] == gzipped.headers['ETag']
+
+
+def test_unknown_etag_gets_full_body():
+    reply = get('/api/characters', **{'If-None-Match': '"outra-versao"'})
+    assert reply.status_code == 200
+    assert reply.get_data()
@@ -0,0 +1,28 @@
+"""/api/record_win só conta sessões que chutaram a solução de hoje."""
+import app as wsgi
+import game_state
+from catalog import get_catalog
+
+
+def solution_name(client):
+    with client.session_transaction() as session:
+        catalog = get_catalog()
+        return catalog.names[game_state.solution_index(session, catalog)]
+
+
+def test_record_win_without_solving_is_rejected():
+    client = wsgi.app.test_client()
+    client.post('/api/start_game')
+    before = wsgi.get_today_correct_count()
+    reply = client.post('/api/record_win')
+    assert reply.status_code == 400
+    assert wsgi.get_today_correct_count() == before
+
+
+def test_record_win_after_solving_counts_once():
+    client = wsgi.app.test_client()
+    count = client.post('/api/start_game').get_json()['todayCorrectCount']
+    won = client.post('/api/guess', json={'guess': solution_name(client)}).get_json()
+    assert won['todayCorrectCount'] == count + 1
+    # A vitória já foi contada pelo /api/guess
+    assert client.post('/api/record_win').get_json()['winnersToday'] == count + 1